@@ -1,16 +1,8 @@
 import streamlit as st
 import os
 
-# Page configuration
-st.set_page_config(
-    page_title="News-Responsive Ad Generation",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS for better styling
-st.markdown("""
+# Static page content, defined once at import instead of rebuilt on every rerun
+HEADER_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -41,7 +33,60 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+ARCH_DIAGRAM_MD = """
+```
+📊 Excel Data → 🕷️ Web Scraping → 🧠 RAG Vector DB → 🤖 GPT-4o → 🎨 DALL-E 3 → 📢 Complete Ads
+    ↓               ↓                    ↓              ↓           ↓             ↓
+Parsed URLs     Landing Page      FAISS Index     Structured   HD Images    Marketing-Ready
+& News Data     Content (20K+)   (265 vectors)   Prompts      + Text       Materials
+                                  384-dim                      Overlays
+```
+"""
+
+COMPONENTS = [
+    ("Data Ingestion Layer", "parse_client_data.py", "Parses Excel file with client URLs and news articles"),
+    ("Web Scraping Layer", "web_scraper.py", "Extracts content from client landing pages"),
+    ("RAG Processing Layer", "rag_processor.py", "Builds FAISS vector database with semantic search"),
+    ("AI Generation Layer", "openai_ad_generator.py", "Real OpenAI GPT-4o integration with structured prompts"),
+    ("Image Generation Layer", "professional_ad_generator.py", "DALL-E 3 HD integration for background images"),
+    ("Pipeline Orchestration", "main_pipeline.py", "Automated end-to-end workflow")
+]
+
+REPO_TREE_CODE = """
+news_generation/
+├── README.md                           # This file
+├── .env                               # OpenAI API key (secure)
+├── .gitignore                         # Protects sensitive files
+├── main_pipeline.py                   # 🚀 Main execution script
+├── parse_client_data.py               # Excel data parser
+├── web_scraper.py                     # Landing page scraper  
+├── rag_processor.py                   # Vector database & semantic search
+├── openai_ad_generator.py             # AI ad generation with GPT-4o
+├── professional_ad_generator.py       # DALL-E 3 + text overlay system
+├── solution_design.md                 # Technical design document
+├── data/                              # Organized data folder
+│   ├── parsed_client_data.json       # Parsed Excel data
+│   ├── client_data_with_content.jsonl.zst # Data + scraped content
+│   └── processed_client_data_rag.json # RAG-processed data
+├── generated_ads_text/                # Text campaign outputs
+│   └── ad_campaigns.jsonl            # Structured ad content
+└── generated_ads_images/              # Visual campaign outputs
+    ├── final_ads/                     # Complete marketing materials
+    └── *_bg_*.png                    # Background images
+"""
+
+# Page configuration
+st.set_page_config(
+    page_title="News-Responsive Ad Generation",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Custom CSS for better styling
+st.html(HEADER_CSS)
 
 # Main header
 st.markdown('<h1 class="main-header">📊 News-Responsive Ad Generation with RAG Architecture</h1>', unsafe_allow_html=True)
@@ -147,55 +192,18 @@ with st.expander("🤖 Step 4: AI Ad Generation with GPT-4o", expanded=True):
 
 # Architecture Overview
 st.markdown('<h2 class="section-header">🏗️ Architecture Overview</h2>', unsafe_allow_html=True)
-st.markdown("""
-```
-📊 Excel Data → 🕷️ Web Scraping → 🧠 RAG Vector DB → 🤖 GPT-4o → 🎨 DALL-E 3 → 📢 Complete Ads
-    ↓               ↓                    ↓              ↓           ↓             ↓
-Parsed URLs     Landing Page      FAISS Index     Structured   HD Images    Marketing-Ready
-& News Data     Content (20K+)   (265 vectors)   Prompts      + Text       Materials
-                                  384-dim                      Overlays
-```
-""")
+st.markdown(ARCH_DIAGRAM_MD)
 
 # Core Components
 st.markdown('<h3>Core Components</h3>', unsafe_allow_html=True)
-components = [
-    ("Data Ingestion Layer", "parse_client_data.py", "Parses Excel file with client URLs and news articles"),
-    ("Web Scraping Layer", "web_scraper.py", "Extracts content from client landing pages"),
-    ("RAG Processing Layer", "rag_processor.py", "Builds FAISS vector database with semantic search"),
-    ("AI Generation Layer", "openai_ad_generator.py", "Real OpenAI GPT-4o integration with structured prompts"),
-    ("Image Generation Layer", "professional_ad_generator.py", "DALL-E 3 HD integration for background images"),
-    ("Pipeline Orchestration", "main_pipeline.py", "Automated end-to-end workflow")
-]
 
-for component, file, description in components:
+for component, file, description in COMPONENTS:
     with st.expander(f"🔧 {component} ({file})"):
         st.markdown(f"**{description}**")
 
 # Repository Structure
 st.markdown('<h2 class="section-header">📁 Repository Structure</h2>', unsafe_allow_html=True)
-st.code("""
-news_generation/
-├── README.md                           # This file
-├── .env                               # OpenAI API key (secure)
-├── .gitignore                         # Protects sensitive files
-├── main_pipeline.py                   # 🚀 Main execution script
-├── parse_client_data.py               # Excel data parser
-├── web_scraper.py                     # Landing page scraper  
-├── rag_processor.py                   # Vector database & semantic search
-├── openai_ad_generator.py             # AI ad generation with GPT-4o
-├── professional_ad_generator.py       # DALL-E 3 + text overlay system
-├── solution_design.md                 # Technical design document
-├── data/                              # Organized data folder
-│   ├── parsed_client_data.json       # Parsed Excel data
-│   ├── client_data_with_content.json # Data + scraped content
-│   └── processed_client_data_rag.json # RAG-processed data
-├── generated_ads_text/                # Text campaign outputs
-│   └── ad_campaigns.json             # Structured ad content
-└── generated_ads_images/              # Visual campaign outputs
-    ├── final_ads/                     # Complete marketing materials
-    └── *_bg_*.png                    # Background images
-""")
+st.code(REPO_TREE_CODE)
 
 # Quick Start
 st.markdown('<h2 class="section-header">⚡ Quick Start</h2>', unsafe_allow_html=True)
@@ -1,80 +1,162 @@
+import asyncio
 import json
-from sklearn.metrics.pairwise import cosine_similarity
+import os
 import numpy as np
+import faiss
 
-def generate_ads(processed_data):
-    ad_outputs = []
-
-    for entry in processed_data:
-        client_url = entry["url"]
-        landing_page_text = entry["landing_page_text"]
-        landing_page_embedding = np.array(entry["landing_page_embedding"]).reshape(1, -1)
-        landing_page_keywords = entry["landing_page_keywords"]
-        news_articles = entry["news_articles"]
-
-        # Calculate similarity and rank news articles
-        ranked_news = []
-        for article in news_articles:
-            article_embedding = np.array(article["embedding"]).reshape(1, -1)
-            similarity = cosine_similarity(landing_page_embedding, article_embedding)[0][0]
-            ranked_news.append({
-                **article,
-                "similarity": similarity
-            })
-        
-        # Sort by similarity in descending order
-        ranked_news = sorted(ranked_news, key=lambda x: x["similarity"], reverse=True)
-
-        # Select top N relevant news articles (e.g., top 3)
-        top_n_news = ranked_news[:3]
-
-        # Simulate LLM interaction for ad generation
-        # In a real scenario, this would be an API call to an LLM
-        # For now, we'll construct a plausible output based on the problem description
-        
-        # Helper function to safely get keyword or default
-        def get_keyword(keywords, index, default_text):
-            return keywords[index] if len(keywords) > index else default_text
-
-        # Helper function to safely get news title or default
-        def get_news_title(news_list, index, default_text):
-            return news_list[index]["title"] if len(news_list) > index else default_text
-
-        simulated_ad_creative = {
-            "client_url": client_url,
-            "landing_page_summary": landing_page_text[:200] + "..." if len(landing_page_text) > 200 else landing_page_text,
-            "relevant_news": [{
-                "title": news["title"],
-                "source": news["source"],
-                "similarity": news["similarity"]
-            } for news in top_n_news],
-            "ad_formats": {
-                "linkedin_single_image": {
-                    "headline": f"[LLM Generated] Discover how {get_keyword(landing_page_keywords, 0, 'our solutions')} align with current market trends.",
-                    "body": f"[LLM Generated] In light of recent news regarding {get_news_title(top_n_news, 0, 'market developments')}, explore our insights on {get_keyword(landing_page_keywords, 0, 'investment strategies')}. Learn more about our approach to {get_keyword(landing_page_keywords, 1, 'sustainable investing')} and how it can benefit your portfolio.",
-                    "call_to_action": "Learn More",
-                    "imagery_suggestion": "[LLM Generated] Image of a diverse group of professionals collaborating in a modern office, with financial charts subtly overlaid in the background. Focus on innovation and growth. Aspect Ratio: Square."
-                },
-                "banner_ad_300x250": {
-                    "headline": f"[LLM Generated] Market Insights: {get_news_title(top_n_news, 0, 'Stay Ahead')}",
-                    "body": f"[LLM Generated] Align your strategy with current {get_keyword(landing_page_keywords, 0, 'market dynamics')}.",
-                    "call_to_action": "Explore Now",
-                    "imagery_suggestion": "[LLM Generated] Abstract financial graphic with upward trending lines, subtle blue and green color palette. Aspect Ratio: Square."
-                }
-            }
+# Above this many articles an IVF index is trained instead of a flat index
+IVF_MIN_ARTICLES = 1000
+IVF_NLIST = 16
+IVF_NPROBE = 4
+
+# Maximum number of concurrent LLM requests
+MAX_CONCURRENT_REQUESTS = 5
+
+def build_news_index(article_embeddings):
+    """Build an inner-product FAISS index over L2-normalized article embeddings"""
+    dimension = article_embeddings.shape[1]
+
+    if len(article_embeddings) >= IVF_MIN_ARTICLES:
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, IVF_NLIST, faiss.METRIC_INNER_PRODUCT)
+        index.train(article_embeddings)
+        index.nprobe = IVF_NPROBE
+    else:
+        index = faiss.IndexFlatIP(dimension)
+
+    index.add(article_embeddings)
+    return index
+
+def rank_news(entry, embeddings):
+    """Return the top 3 news articles for a client entry with their cosine similarity"""
+    landing_page_embedding = np.array(embeddings[entry["landing_page_embedding_idx"]], dtype=np.float32)
+    news_articles = entry["news_articles"]
+
+    # Rank news articles by cosine similarity with a FAISS inner-product search
+    if not news_articles:
+        return []
+
+    article_embeddings = np.asarray(embeddings[[article["embedding_idx"] for article in news_articles]], dtype=np.float32)
+    index = build_news_index(article_embeddings)
+
+    # Embeddings are stored L2-normalized, so inner product is cosine similarity
+    query = landing_page_embedding.reshape(1, -1)
+
+    # Select top N relevant news articles (e.g., top 3)
+    scores, indices = index.search(query, min(3, len(news_articles)))
+    return [{
+        **news_articles[idx],
+        "similarity": float(score)
+    } for score, idx in zip(scores[0], indices[0]) if idx != -1]
+
+def simulate_ad_formats(landing_page_keywords, top_n_news):
+    """Construct a plausible ad output without calling an LLM"""
+    # Helper function to safely get keyword or default
+    def get_keyword(keywords, index, default_text):
+        return keywords[index] if len(keywords) > index else default_text
+
+    # Helper function to safely get news title or default
+    def get_news_title(news_list, index, default_text):
+        return news_list[index]["title"] if len(news_list) > index else default_text
+
+    return {
+        "linkedin_single_image": {
+            "headline": f"[LLM Generated] Discover how {get_keyword(landing_page_keywords, 0, 'our solutions')} align with current market trends.",
+            "body": f"[LLM Generated] In light of recent news regarding {get_news_title(top_n_news, 0, 'market developments')}, explore our insights on {get_keyword(landing_page_keywords, 0, 'investment strategies')}. Learn more about our approach to {get_keyword(landing_page_keywords, 1, 'sustainable investing')} and how it can benefit your portfolio.",
+            "call_to_action": "Learn More",
+            "imagery_suggestion": "[LLM Generated] Image of a diverse group of professionals collaborating in a modern office, with financial charts subtly overlaid in the background. Focus on innovation and growth. Aspect Ratio: Square."
+        },
+        "banner_ad_300x250": {
+            "headline": f"[LLM Generated] Market Insights: {get_news_title(top_n_news, 0, 'Stay Ahead')}",
+            "body": f"[LLM Generated] Align your strategy with current {get_keyword(landing_page_keywords, 0, 'market dynamics')}.",
+            "call_to_action": "Explore Now",
+            "imagery_suggestion": "[LLM Generated] Abstract financial graphic with upward trending lines, subtle blue and green color palette. Aspect Ratio: Square."
         }
-        ad_outputs.append(simulated_ad_creative)
+    }
+
+async def llm_ad_formats(llm_client, client_url, landing_page_text, landing_page_keywords, top_n_news):
+    """Generate ad formats with GPT-4o in JSON mode"""
+    news_lines = "\n".join(f"- {news['title']} ({news['source']})" for news in top_n_news)
+    prompt = (
+        f"Client landing page: {client_url}\n"
+        f"Landing page summary: {landing_page_text[:800]}\n"
+        f"Keywords: {', '.join(landing_page_keywords)}\n"
+        f"Relevant news:\n{news_lines}\n\n"
+        "Write ad creative connecting the client's expertise with the news. Return JSON with keys "
+        "\"linkedin_single_image\" and \"banner_ad_300x250\", each containing \"headline\", \"body\", "
+        "\"call_to_action\" and \"imagery_suggestion\"."
+    )
+    response = await llm_client.chat.completions.create(
+        model="gpt-4o",
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": "You are a compliant marketing copywriter for asset management firms."},
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return json.loads(response.choices[0].message.content)
+
+async def generate_client_ad(entry, embeddings, llm_client, semaphore):
+    """Rank news and generate ad creative for one client entry"""
+    client_url = entry["url"]
+    landing_page_text = entry["landing_page_text"]
+    landing_page_keywords = entry["landing_page_keywords"]
+
+    top_n_news = rank_news(entry, embeddings)
+
+    ad_formats = None
+    if llm_client is not None:
+        # The semaphore bounds how many clients are waiting on the API at once
+        async with semaphore:
+            try:
+                ad_formats = await llm_ad_formats(llm_client, client_url, landing_page_text, landing_page_keywords, top_n_news)
+            except Exception as e:
+                print(f"LLM generation failed for {client_url}, using simulated output: {e}")
+
+    # Without an LLM client, construct a plausible output based on the problem description
+    if ad_formats is None:
+        ad_formats = simulate_ad_formats(landing_page_keywords, top_n_news)
 
-    return ad_outputs
+    return {
+        "client_url": client_url,
+        "landing_page_summary": landing_page_text[:200] + "..." if len(landing_page_text) > 200 else landing_page_text,
+        "relevant_news": [{
+            "title": news["title"],
+            "source": news["source"],
+            "similarity": news["similarity"]
+        } for news in top_n_news],
+        "ad_formats": ad_formats
+    }
+
+async def generate_ads(processed_data, embeddings, llm_client=None):
+    """
+    embeddings is the (N, d) float16 array saved by nlp_processor; entries
+    reference its rows through landing_page_embedding_idx / embedding_idx.
+    Rows are upcast to float32 for the FAISS search.
+
+    llm_client is an optional AsyncOpenAI client; all clients are generated
+    concurrently and results keep the order of processed_data
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return await asyncio.gather(*(
+        generate_client_ad(entry, embeddings, llm_client, semaphore)
+        for entry in processed_data
+    ))
 
 if __name__ == "__main__":
     with open("/home/ubuntu/processed_client_data.json", "r") as f:
         processed_data = json.load(f)
+    # Memory-map the embedding sidecar; rows are only paged in when indexed
+    embeddings = np.load("/home/ubuntu/processed_client_embeddings.npy", mmap_mode="r")
+
+    # Use GPT-4o when an API key is configured, otherwise simulate the LLM output
+    llm_client = None
+    if os.getenv("OPENAI_API_KEY"):
+        from openai import AsyncOpenAI
+        llm_client = AsyncOpenAI()
 
-    generated_ads = generate_ads(processed_data)
+    generated_ads = asyncio.run(generate_ads(processed_data, embeddings, llm_client))
 
     with open("/home/ubuntu/generated_ads.json", "w") as f:
         json.dump(generated_ads, f, indent=4)
     print("Generated ads saved to /home/ubuntu/generated_ads.json")
-
-
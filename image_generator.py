@@ -2,12 +2,15 @@
 AI Image Generator for Ad Campaigns
 Uses OpenAI DALL-E to generate professional marketing images
 """
+import asyncio
+import hashlib
 import json
 import os
-from openai import OpenAI
+import shutil
+from openai import AsyncOpenAI
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
-import time
 
 # Load environment variables
 try:
@@ -18,6 +21,14 @@ except ImportError:
     print("⚠️  python-dotenv not installed")
 
 class ImageGenerator:
+    # Maximum number of DALL-E requests in flight at once
+    MAX_CONCURRENT_REQUESTS = 5
+    IMAGE_MODEL = "dall-e-3"
+    IMAGE_QUALITY = "standard"
+    # Content-addressed store of generated images, keyed by model, prompt, size and quality
+    # (as in ProfessionalAdGenerator); the prompt names the client, so images are per client
+    IMAGE_CACHE_DIR = "image_cache"
+    
     def __init__(self, api_key: str = None):
         """Initialize DALL-E image generator"""
         if api_key is None:
@@ -27,8 +38,15 @@ class ImageGenerator:
             print("⚠️  No OpenAI API key found for image generation")
             self.client = None
         else:
-            self.client = OpenAI(api_key=api_key)
+            self.client = AsyncOpenAI(api_key=api_key)
             print("✅ OpenAI DALL-E client initialized")
+        
+        # Pooled HTTP session so image downloads reuse keep-alive connections
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+        
+        # In-flight cache fills, so identical prompts within a run share one API call
+        self._pending_images = {}
     
     def enhance_image_prompt(self, description: str, client_name: str, ad_format: str) -> str:
         """Enhance image description for better DALL-E results"""
@@ -53,7 +71,7 @@ class ImageGenerator:
         
         return enhanced
     
-    def generate_image(self, prompt: str, size: str = "1024x1024") -> str:
+    async def generate_image(self, prompt: str, size: str = "1024x1024") -> str:
         """Generate image using DALL-E"""
         if not self.client:
             print("❌ No OpenAI client available for image generation")
@@ -62,11 +80,11 @@ class ImageGenerator:
         try:
             print(f"🎨 Generating image with prompt: {prompt[:100]}...")
             
-            response = self.client.images.generate(
-                model="dall-e-3",
+            response = await self.client.images.generate(
+                model=self.IMAGE_MODEL,
                 prompt=prompt,
                 size=size,
-                quality="standard",
+                quality=self.IMAGE_QUALITY,
                 n=1,
             )
             
@@ -81,11 +99,13 @@ class ImageGenerator:
     def download_image(self, image_url: str, filename: str) -> bool:
         """Download image from URL to local file"""
         try:
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-            
-            with open(filename, 'wb') as f:
-                f.write(response.content)
+            # Stream the body to disk in chunks instead of buffering the whole PNG
+            with self.session.get(image_url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                
+                with open(filename, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        f.write(chunk)
             
             print(f"💾 Image saved: {filename}")
             return True
@@ -94,6 +114,108 @@ class ImageGenerator:
             print(f"❌ Error downloading image: {e}")
             return False
     
+    def _image_cache_path(self, prompt: str, size: str) -> str:
+        """Path of the cached image for a prompt, size, model and quality"""
+        key = hashlib.sha256(f"{self.IMAGE_MODEL}|{prompt}|{size}|{self.IMAGE_QUALITY}".encode('utf-8')).hexdigest()
+        return os.path.join(self.IMAGE_CACHE_DIR, f"{key}.png")
+    
+    async def _fill_image_cache(self, semaphore: asyncio.Semaphore, prompt: str, size: str, cache_path: str) -> str:
+        """Generate an image with DALL-E and download it into the cache"""
+        # Rate limiting - the semaphore bounds concurrent API calls
+        async with semaphore:
+            image_url = await self.generate_image(prompt, size)
+        
+        if not image_url:
+            return None
+        
+        # Download to a temporary name so a failed download never looks like a cache hit
+        partial_path = f"{cache_path}.part"
+        if not await asyncio.to_thread(self.download_image, image_url, partial_path):
+            return None
+        os.replace(partial_path, cache_path)
+        return cache_path
+    
+    async def _get_cached_image(self, semaphore: asyncio.Semaphore, prompt: str, size: str) -> str:
+        """Return the cached image path for a prompt, generating it on a miss"""
+        cache_path = self._image_cache_path(prompt, size)
+        if os.path.exists(cache_path):
+            print(f"♻️  Reusing cached image for prompt: {prompt[:60]}...")
+            return cache_path
+        
+        if cache_path not in self._pending_images:
+            self._pending_images[cache_path] = asyncio.ensure_future(
+                self._fill_image_cache(semaphore, prompt, size, cache_path)
+            )
+        return await self._pending_images[cache_path]
+    
+    async def _generate_campaign_image(self, semaphore: asyncio.Semaphore, images_dir: str,
+                                       client_name: str, ad_format: str, ad_data: dict) -> dict:
+        """Generate and download a single campaign image, bounded by the semaphore"""
+        image_description = ad_data.get('image_description', '')
+        
+        # Enhance prompt for better results
+        enhanced_prompt = self.enhance_image_prompt(
+            image_description, client_name, ad_format
+        )
+        
+        # Determine image size based on format
+        if "banner" in ad_format.lower():
+            size = "1792x1024"  # Wide format for banners
+        elif "linkedin" in ad_format.lower():
+            size = "1024x1024"  # Square format for LinkedIn
+        else:
+            size = "1024x1024"  # Default square
+        
+        cache_path = await self._get_cached_image(semaphore, enhanced_prompt, size)
+        if not cache_path:
+            return None
+        
+        # Create filename
+        safe_client = client_name.replace(' ', '_').replace('.', '')
+        safe_format = ad_format.replace(' ', '_')
+        timestamp = datetime.now().strftime("%H%M%S")
+        filename = f"{images_dir}/{safe_client}_{safe_format}_{timestamp}.png"
+        
+        await asyncio.to_thread(shutil.copyfile, cache_path, filename)
+        print(f"💾 Image saved: {filename}")
+        
+        return {
+            'client': client_name,
+            'ad_format': ad_format,
+            'filename': filename,
+            'original_description': image_description,
+            'enhanced_prompt': enhanced_prompt,
+            'headline': ad_data.get('headline', ''),
+            'size': size
+        }
+    
+    async def _generate_campaign_images_async(self, campaigns: list, images_dir: str) -> list:
+        """Generate all campaign images concurrently"""
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        os.makedirs(self.IMAGE_CACHE_DIR, exist_ok=True)
+        self._pending_images = {}
+        tasks = []
+        
+        for campaign in campaigns:
+            client_name = campaign.get('client_name', 'Client')
+            ad_creative = campaign.get('ad_creative', {})
+            
+            print(f"\n🎯 Queueing images for {client_name}")
+            
+            for ad_format, ad_data in ad_creative.items():
+                if not isinstance(ad_data, dict):
+                    continue
+                
+                if not ad_data.get('image_description', ''):
+                    continue
+                
+                tasks.append(self._generate_campaign_image(
+                    semaphore, images_dir, client_name, ad_format, ad_data
+                ))
+        
+        results = await asyncio.gather(*tasks)
+        return [result for result in results if result]
+    
     def generate_campaign_images(self, campaigns_file: str = 'generated_ad_campaigns.json'):
         """Generate images for all ad campaigns"""
         
@@ -110,60 +232,7 @@ class ImageGenerator:
             print(f"❌ Campaign file not found: {campaigns_file}")
             return
         
-        generated_images = []
-        
-        for campaign in campaigns:
-            client_name = campaign.get('client_name', 'Client')
-            ad_creative = campaign.get('ad_creative', {})
-            
-            print(f"\n🎯 Generating images for {client_name}")
-            print("-" * 40)
-            
-            for ad_format, ad_data in ad_creative.items():
-                if not isinstance(ad_data, dict):
-                    continue
-                
-                image_description = ad_data.get('image_description', '')
-                if not image_description:
-                    continue
-                
-                # Enhance prompt for better results
-                enhanced_prompt = self.enhance_image_prompt(
-                    image_description, client_name, ad_format
-                )
-                
-                # Determine image size based on format
-                if "banner" in ad_format.lower():
-                    size = "1792x1024"  # Wide format for banners
-                elif "linkedin" in ad_format.lower():
-                    size = "1024x1024"  # Square format for LinkedIn
-                else:
-                    size = "1024x1024"  # Default square
-                
-                # Generate image
-                image_url = self.generate_image(enhanced_prompt, size)
-                
-                if image_url:
-                    # Create filename
-                    safe_client = client_name.replace(' ', '_').replace('.', '')
-                    safe_format = ad_format.replace(' ', '_')
-                    timestamp = datetime.now().strftime("%H%M%S")
-                    filename = f"{images_dir}/{safe_client}_{safe_format}_{timestamp}.png"
-                    
-                    # Download image
-                    if self.download_image(image_url, filename):
-                        generated_images.append({
-                            'client': client_name,
-                            'ad_format': ad_format,
-                            'filename': filename,
-                            'original_description': image_description,
-                            'enhanced_prompt': enhanced_prompt,
-                            'headline': ad_data.get('headline', ''),
-                            'size': size
-                        })
-                
-                # Rate limiting - be respectful with API
-                time.sleep(2)
+        generated_images = asyncio.run(self._generate_campaign_images_async(campaigns, images_dir))
         
         # Save metadata
         metadata_file = f"{images_dir}/image_metadata.json"
@@ -1,14 +1,117 @@
 from sentence_transformers import SentenceTransformer
+import hashlib
 import json
+import os
+try:
+    # RE2 matches with a linear-time automaton instead of backtracking
+    import re2 as re
+except ImportError:
+    import re
+import re as unicode_re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from rake_nltk import Rake
 
+MODEL_NAME = "all-MiniLM-L6-v2"
+# Dynamically int8-quantized ONNX export published in the all-MiniLM-L6-v2 hub repo
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+def load_embedding_model(use_onnx=True):
+    # ONNX Runtime int8 is several times faster than eager PyTorch on CPU;
+    # the ONNX backend needs optimum[onnxruntime], so fall back to PyTorch without it
+    if use_onnx:
+        try:
+            model = SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+            return model, f"{MODEL_NAME}-onnx-int8"
+        except Exception as e:
+            print(f"⚠️ ONNX int8 backend unavailable ({e}), using PyTorch")
+    return SentenceTransformer(MODEL_NAME), MODEL_NAME
+
+def embedding_model_tag(model):
+    # Identifies a preloaded model in the embedding cache key: its hub name and, for a
+    # non-PyTorch backend, the backend, so e.g. ONNX and PyTorch vectors never mix
+    name = getattr(getattr(model, "model_card_data", None), "base_model", None) or MODEL_NAME
+    name = name.split("/")[-1]
+    backend = getattr(model, "backend", "torch")
+    return name if backend == "torch" else f"{name}-{backend}"
+
+# Precompiled word tokenizer for RAKE in place of NLTK's word_tokenize;
+# punctuation stays as single-character tokens so phrases still split on it.
+# Compiled with stdlib re, whose \w is Unicode-aware (RE2's is ASCII-only), so
+# accented words such as "Société" stay whole whichever engine is installed
+TOKEN_PATTERN = unicode_re.compile(r"[^\W_][\w'-]*|[^\w\s]")
+
+def tokenize_words(sentence):
+    return TOKEN_PATTERN.findall(sentence)
+
+# One Rake per worker process, built on first use so NLTK state is never pickled
+_rake = None
+
+def _rake_one(text):
+    global _rake
+    if _rake is None:
+        _rake = Rake(word_tokenizer=tokenize_words)
+    _rake.extract_keywords_from_text(text)
+    return _rake.get_ranked_phrases()[:5] # Get top 5 ranked phrases as keywords
+
+def extract_keywords_parallel(texts, chunksize=8):
+    # RAKE is CPU-bound pure Python, so independent documents are spread across cores
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(_rake_one, texts, chunksize=chunksize))
+
 class NLPProcessor:
-    def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.rake = Rake()
+    def __init__(self, model=None, cache_dir="embedding_cache", model_tag=None):
+        # Reuse a preloaded model when given (e.g. the Streamlit cached resource); its cache
+        # tag comes from the caller (as returned by load_embedding_model) or from the model itself
+        if model is not None:
+            self.model, self.model_tag = model, model_tag or embedding_model_tag(model)
+        else:
+            self.model, self.model_tag = load_embedding_model()
+        self.rake = Rake(word_tokenizer=tokenize_words)
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _cache_path(self, text):
+        # Content-addressed by model and text so a model change never serves stale vectors
+        h = hashlib.sha256(f"{self.model_tag}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{h}.npy")
+
+    def _cached_embed(self, text):
+        path = self._cache_path(text)
+        if os.path.exists(path):
+            return np.load(path)
+        embedding = self.model.encode(text, convert_to_numpy=True)
+        np.save(path, embedding)
+        return embedding
 
     def get_embedding(self, text):
-        return self.model.encode(text).tolist()
+        # L2-normalized once here so downstream similarity is a bare dot product
+        embedding = self._cached_embed(text)
+        return (embedding / np.linalg.norm(embedding)).tolist()
+
+    def get_embeddings_batch(self, texts, batch_size=64):
+        # Only encode texts missing from the disk cache, in one batched forward pass
+        paths = [self._cache_path(text) for text in texts]
+        embeddings = [np.load(path) if os.path.exists(path) else None for path in paths]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            # Identical texts (e.g. repeated title + source) are tokenized and encoded once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = self.model.encode(unique_texts, batch_size=batch_size,
+                                        show_progress_bar=False, convert_to_numpy=True)
+            lookup = dict(zip(unique_texts, encoded))
+            for text, embedding in lookup.items():
+                np.save(self._cache_path(text), embedding)
+            for i in missing:
+                embeddings[i] = lookup[texts[i]]
+
+        # Reassemble in input order; rows are L2-normalized
+        if not embeddings:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        embeddings = np.vstack(embeddings).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings
 
     def extract_keywords(self, text):
         self.rake.extract_keywords_from_text(text)
@@ -21,8 +124,9 @@ if __name__ == "__main__":
     with open("/home/ubuntu/parsed_client_data.json", "r") as f:
         client_data = json.load(f)
 
-    # Process each client entry
-    processed_client_data = []
+    # Collect landing page and article texts for each client entry
+    entries = []
+    texts = []
     for entry in client_data:
         url = entry["url"]
         news_articles = entry["news_articles"]
@@ -35,30 +139,42 @@ if __name__ == "__main__":
         else:
             landing_page_text = "Placeholder text for " + url # Replace with actual scraping
 
-        landing_page_embedding = processor.get_embedding(landing_page_text)
-        landing_page_keywords = processor.extract_keywords(landing_page_text)
+        article_texts = [article["title"] + " " + article["source"] for article in news_articles] # Combine title and source for embedding
+        entries.append((url, landing_page_text, news_articles, article_texts, len(texts)))
+        texts.append(landing_page_text)
+        texts.extend(article_texts)
+
+    # Embed every text in a single batched call and extract keywords across all cores
+    embeddings = processor.get_embeddings_batch(texts)
+    keywords = extract_keywords_parallel(texts)
+
+    # Point each client entry at its rows in the embedding matrix
+    processed_client_data = []
+    for url, landing_page_text, news_articles, article_texts, offset in entries:
+        landing_page_keywords = keywords[offset]
 
         processed_news_articles = []
-        for article in news_articles:
-            article_text = article["title"] + " " + article["source"] # Combine title and source for embedding
-            article_embedding = processor.get_embedding(article_text)
-            article_keywords = processor.extract_keywords(article_text)
+        for i, article in enumerate(news_articles):
             processed_news_articles.append({
                 **article,
-                "embedding": article_embedding,
-                "keywords": article_keywords
+                "embedding_idx": offset + 1 + i,
+                "keywords": keywords[offset + 1 + i]
             })
 
         processed_client_data.append({
             "url": url,
             "landing_page_text": landing_page_text,
-            "landing_page_embedding": landing_page_embedding,
+            "landing_page_embedding_idx": offset,
             "landing_page_keywords": landing_page_keywords,
             "news_articles": processed_news_articles
         })
 
+    # Embeddings go to a float16 sidecar (half the size of float32, same top-k ranking);
+    # the JSON only stores row indices into it
+    np.save("/home/ubuntu/processed_client_embeddings.npy", embeddings.astype(np.float16))
     with open("/home/ubuntu/processed_client_data.json", "w") as f:
         json.dump(processed_client_data, f, indent=4)
     print("Processed client data saved to /home/ubuntu/processed_client_data.json")
+    print("Embeddings saved to /home/ubuntu/processed_client_embeddings.npy")
 
 
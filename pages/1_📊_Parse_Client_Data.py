@@ -1,7 +1,8 @@
 import streamlit as st
 import sys
 import os
-import json
+import shutil
+import orjson
 from pathlib import Path
 
 # Add utils directory to path
@@ -9,6 +10,8 @@ sys.path.append(str(Path(__file__).parent.parent / "utils"))
 
 # Import the existing parsing logic
 from parse_client_data import parse_client_data
+from streamlit_setup import load_json
+from ui_css import inject_page_css
 
 # Page configuration
 st.set_page_config(
@@ -18,31 +21,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .success-box {
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .info-box {
-        background-color: #d1ecf1;
-        border: 1px solid #bee5eb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+inject_page_css()
 
 # Header
 st.title("📊 Parse Client Data")
@@ -70,8 +49,10 @@ if st.button("🚀 Parse Client Data", type="primary"):
                 if uploaded_file is not None:
                     # Save uploaded file temporarily
                     temp_path = "temp_upload.xlsx"
+                    # Stream to disk in 1 MiB chunks rather than copying the whole upload at once
+                    uploaded_file.seek(0)
                     with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
+                        shutil.copyfileobj(uploaded_file, f, length=1 << 20)
                     file_path = temp_path
                 else:
                     file_path = "URL_and_news_articles_examples_by_client.xlsx"
@@ -84,8 +65,8 @@ if st.button("🚀 Parse Client Data", type="primary"):
                 data_dir.mkdir(exist_ok=True)
                 
                 output_path = data_dir / "parsed_client_data.json"
-                with open(output_path, 'w') as f:
-                    json.dump(parsed_data, f, indent=4)
+                with open(output_path, 'wb') as f:
+                    f.write(orjson.dumps(parsed_data, option=orjson.OPT_INDENT_2))
                 
                 # Clean up temp file if used
                 if uploaded_file is not None and os.path.exists(temp_path):
@@ -113,8 +94,7 @@ if st.button("🚀 Parse Client Data", type="primary"):
                             if len(client['news_articles']) > 3:
                                 st.markdown(f"... and {len(client['news_articles']) - 3} more")
                 
-                # Store in session state for other pages
-                st.session_state.parsed_data = parsed_data
+                # Record the output path for other pages (loaded on demand via get_session_data)
                 st.session_state.parsed_data_path = str(output_path)
                 
             except Exception as e:
@@ -129,13 +109,11 @@ if os.path.exists("data/parsed_client_data.json"):
     st.markdown("Found existing parsed data:")
     
     try:
-        with open("data/parsed_client_data.json", 'r') as f:
-            existing_data = json.load(f)
+        existing_data = load_json("data/parsed_client_data.json")
         
         st.success(f"✅ Found {len(existing_data)} clients in existing data")
         
-        # Load into session state
-        st.session_state.parsed_data = existing_data
+        # Record where the data lives for other pages
         st.session_state.parsed_data_path = "data/parsed_client_data.json"
         
         # Show preview
@@ -1,14 +1,17 @@
 import streamlit as st
 import sys
 import os
-import json
+import orjson
+import asyncio
 from pathlib import Path
 
 # Add utils directory to path
 sys.path.append(str(Path(__file__).parent.parent / "utils"))
 
 # Import the existing scraping logic
-from web_scraper import scrape_text_from_url
+from web_scraper import scrape_all_urls, save_content_samples, CLIENT_CONTENT_PATH
+from streamlit_setup import load_json, stream_jsonl, open_jsonl_writer
+from ui_css import inject_page_css
 
 # Page configuration
 st.set_page_config(
@@ -18,31 +21,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .success-box {
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .info-box {
-        background-color: #d1ecf1;
-        border: 1px solid #bee5eb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+inject_page_css()
 
 # Header
 st.title("🕷️ Web Scraper")
@@ -55,8 +34,7 @@ if not os.path.exists("data/parsed_client_data.json"):
 
 # Load parsed data
 try:
-    with open("data/parsed_client_data.json", 'r') as f:
-        client_data = json.load(f)
+    client_data = load_json("data/parsed_client_data.json")
     st.success(f"✅ Loaded {len(client_data)} clients from parsed data")
 except Exception as e:
     st.error(f"❌ Error loading parsed data: {str(e)}")
@@ -88,81 +66,96 @@ if st.button("🚀 Start Web Scraping", type="primary"):
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            successful_scrapes = 0
-            failed_scrapes = 0
+            scrape_counts = {'successful': 0, 'failed': 0}
             
             # Determine which clients to scrape
             clients_to_scrape = client_data if scrape_all else [c for c in client_data if c['client_name'] == st.session_state.get('selected_client')]
             
-            for i, client in enumerate(clients_to_scrape):
-                status_text.text(f"Scraping {client['client_name']}...")
+            samples = []
+            with open_jsonl_writer(CLIENT_CONTENT_PATH) as jsonl_file:
+                # Carry over clients that are not scraped in this run
+                scraped_names = {client['client_name'] for client in clients_to_scrape}
+                for client in client_data:
+                    if client['client_name'] not in scraped_names:
+                        jsonl_file.write(orjson.dumps(client) + b"\n")
+                
+                # Fetch all landing pages concurrently; each client is persisted as soon as its page finishes
+                completed = []
                 
-                try:
-                    # Scrape the URL using existing logic
-                    content = scrape_text_from_url(client['url'])
+                def record_content(index, content):
+                    client = clients_to_scrape[index]
                     client['landing_page_content'] = content
+                    jsonl_file.write(orjson.dumps(client) + b"\n")
+                    jsonl_file.flush()
+                    
+                    completed.append(index)
+                    status_text.text(f"Scraped {client['client_name']} ({len(completed)}/{len(clients_to_scrape)})")
+                    progress_bar.progress(len(completed) / len(clients_to_scrape))
                     
                     if content:
-                        successful_scrapes += 1
+                        scrape_counts['successful'] += 1
                         st.success(f"✅ {client['client_name']}: {len(content)} characters scraped")
                         
-                        # Save sample if requested
+                        # Collect sample if requested; all samples are written in one archive below
                         if save_samples:
-                            sample_path = f"data/{client['client_name'].replace(' ', '_')}_content.txt"
-                            with open(sample_path, "w", encoding="utf-8") as f:
-                                f.write(content[:1000] + "..." if len(content) > 1000 else content)
-                            st.info(f"📄 Sample saved to: {sample_path}")
+                            samples.append((client['client_name'], content))
                         
                         # Show content preview if requested
                         if show_content:
                             with st.expander(f"📄 Content Preview - {client['client_name']}"):
                                 st.text_area("Scraped Content", content[:500] + "..." if len(content) > 500 else content, height=200)
                     else:
-                        failed_scrapes += 1
+                        scrape_counts['failed'] += 1
                         st.error(f"❌ {client['client_name']}: Failed to scrape content")
-                        
-                except Exception as e:
-                    failed_scrapes += 1
-                    st.error(f"❌ {client['client_name']}: Error - {str(e)}")
                 
-                # Update progress
-                progress_bar.progress((i + 1) / len(clients_to_scrape))
+                status_text.text(f"Scraping {len(clients_to_scrape)} landing pages...")
+                asyncio.run(scrape_all_urls(
+                    [client['url'] for client in clients_to_scrape],
+                    timeout=timeout,
+                    on_complete=record_content
+                ))
             
-            # Save updated data
-            output_path = "data/client_data_with_content.json"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(client_data, f, indent=2, ensure_ascii=False)
+            if samples:
+                sample_path = save_content_samples(samples)
+                st.info(f"📄 {len(samples)} content samples saved to: {sample_path}")
             
-            st.success(f"✅ Scraping completed! {successful_scrapes} successful, {failed_scrapes} failed")
-            st.markdown(f"**Output saved to:** `{output_path}`")
+            st.success(f"✅ Scraping completed! {scrape_counts['successful']} successful, {scrape_counts['failed']} failed")
+            st.markdown(f"**Output saved to:** `{CLIENT_CONTENT_PATH}`")
             
-            # Store in session state
-            st.session_state.client_data_with_content = client_data
-            st.session_state.client_data_with_content_path = output_path
+            # Record the output path for other pages (loaded on demand via get_session_data)
+            st.session_state.client_data_with_content_path = CLIENT_CONTENT_PATH
 
 # Display existing scraped data if available
-if os.path.exists("data/client_data_with_content.json"):
+if os.path.exists(CLIENT_CONTENT_PATH) or os.path.exists("data/client_data_with_content.json"):
     st.header("📂 Existing Scraped Data")
     st.markdown("Found existing scraped data:")
     
     try:
-        with open("data/client_data_with_content.json", 'r', encoding='utf-8') as f:
-            existing_data = json.load(f)
+        # Stream the JSONL file when present; fall back to the legacy JSON export
+        if os.path.exists(CLIENT_CONTENT_PATH):
+            existing_clients = stream_jsonl(CLIENT_CONTENT_PATH)
+            existing_path = CLIENT_CONTENT_PATH
+        else:
+            existing_clients = iter(load_json("data/client_data_with_content.json"))
+            existing_path = "data/client_data_with_content.json"
+        
+        # Only the per-client summary is kept, not the landing page text
+        summaries = []
+        for client in existing_clients:
+            content_length = len(client.get('landing_page_content') or '')
+            summaries.append((client['client_name'], content_length))
         
-        scraped_count = sum(1 for client in existing_data if client.get('landing_page_content'))
-        st.success(f"✅ Found {scraped_count}/{len(existing_data)} clients with scraped content")
+        scraped_count = sum(1 for _, content_length in summaries if content_length)
+        st.success(f"✅ Found {scraped_count}/{len(summaries)} clients with scraped content")
         
-        # Load into session state
-        st.session_state.client_data_with_content = existing_data
-        st.session_state.client_data_with_content_path = "data/client_data_with_content.json"
+        # Record where the data lives for other pages
+        st.session_state.client_data_with_content_path = existing_path
         
         # Show preview
         with st.expander("👀 Preview Scraped Data"):
-            for client in existing_data:
-                has_content = bool(client.get('landing_page_content'))
-                status = "✅" if has_content else "❌"
-                content_length = len(client.get('landing_page_content', ''))
-                st.markdown(f"{status} **{client['client_name']}** - {content_length} characters")
+            for client_name, content_length in summaries:
+                status = "✅" if content_length else "❌"
+                st.markdown(f"{status} **{client_name}** - {content_length} characters")
         
     except Exception as e:
         st.error(f"❌ Error loading existing scraped data: {str(e)}")
@@ -1,7 +1,7 @@
 import streamlit as st
 import sys
 import os
-import json
+import orjson
 from pathlib import Path
 
 # Add utils directory to path
@@ -9,7 +9,9 @@ sys.path.append(str(Path(__file__).parent.parent / "utils"))
 
 # Import the existing RAG processing logic and Streamlit setup
 from rag_processor import RAGProcessor, process_client_data_with_rag
-from streamlit_setup import setup_nltk_for_streamlit
+from web_scraper import CLIENT_CONTENT_PATH
+from streamlit_setup import setup_nltk_for_streamlit, get_sentence_transformer, load_json, get_rag_processor
+from ui_css import inject_page_css
 
 # Page configuration
 st.set_page_config(
@@ -19,31 +21,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .success-box {
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .info-box {
-        background-color: #d1ecf1;
-        border: 1px solid #bee5eb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+inject_page_css()
 
 # Header
 st.title("🧠 RAG Processor")
@@ -59,14 +37,13 @@ if 'nltk_setup_complete' not in st.session_state:
         st.stop()
 
 # Check for scraped data
-if not os.path.exists("data/client_data_with_content.json"):
+if not os.path.exists(CLIENT_CONTENT_PATH):
     st.error("❌ No scraped client data found. Please run the Web Scraper step first.")
     st.stop()
 
 # Load scraped data
 try:
-    with open("data/client_data_with_content.json", 'r', encoding='utf-8') as f:
-        client_data = json.load(f)
+    client_data = load_json(CLIENT_CONTENT_PATH)
     st.success(f"✅ Loaded {len(client_data)} clients from scraped data")
 except Exception as e:
     st.error(f"❌ Error loading scraped data: {str(e)}")
@@ -94,25 +71,25 @@ if st.button("🚀 Build Vector Database", type="primary"):
     with st.spinner("Building vector database..."):
         try:
             # Initialize RAG processor
-            rag_processor = RAGProcessor(model_name=model_name)
+            rag_processor = RAGProcessor(model_name=model_name, model=get_sentence_transformer(model_name))
             
             # Build vector database
             rag_processor.build_vector_database(client_data)
             
             # Process client data with RAG
-            processed_data = process_client_data_with_rag("data/client_data_with_content.json")
+            processed_data = process_client_data_with_rag(CLIENT_CONTENT_PATH, client_data=client_data,
+                                                          rag_processor=rag_processor)
             
             # Save processed data
             output_path = "data/processed_client_data_rag.json"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(processed_data, f, indent=2, ensure_ascii=False)
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(processed_data, option=orjson.OPT_INDENT_2))
             
             st.success("✅ Vector database built successfully!")
             st.markdown(f"**Output saved to:** `{output_path}`")
             
             # Store in session state
             st.session_state.rag_processor = rag_processor
-            st.session_state.processed_data = processed_data
             st.session_state.processed_data_path = output_path
             
             # Display statistics
@@ -245,13 +222,11 @@ if os.path.exists("data/processed_client_data_rag.json"):
     st.markdown("Found existing RAG-processed data:")
     
     try:
-        with open("data/processed_client_data_rag.json", 'r', encoding='utf-8') as f:
-            existing_data = json.load(f)
+        existing_data = load_json("data/processed_client_data_rag.json")
         
         st.success(f"✅ Found processed data for {len(existing_data)} clients")
         
-        # Load into session state
-        st.session_state.processed_data = existing_data
+        # Record where the data lives for other pages
         st.session_state.processed_data_path = "data/processed_client_data_rag.json"
         
         # Show preview
@@ -270,13 +245,13 @@ if os.path.exists("data/processed_client_data_rag.json"):
 
 # Vector Database Status
 st.header("🗄️ Vector Database Status")
-if os.path.exists("data/vector_index.faiss") and os.path.exists("data/vector_metadata.pkl"):
+if os.path.exists("data/vector_index.faiss") and (os.path.exists("data/vector_metadata.parquet") or os.path.exists("data/vector_metadata.pkl")):
     st.success("✅ Vector database files found")
     
     # Load and display database info
     try:
-        rag_processor = RAGProcessor()
-        if rag_processor.load_index():
+        rag_processor = get_rag_processor(os.path.getmtime("data/vector_index.faiss"))
+        if rag_processor is not None:
             st.info(f"📊 Database contains {len(rag_processor.metadata)} embeddings")
             st.info(f"🔢 Embedding dimension: {rag_processor.dimension}")
             
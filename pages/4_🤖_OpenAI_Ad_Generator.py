@@ -1,14 +1,16 @@
 import streamlit as st
 import sys
 import os
-import json
 from pathlib import Path
 
 # Add utils directory to path
 sys.path.append(str(Path(__file__).parent.parent / "utils"))
 
-# Import the existing OpenAI ad generation logic
-from openai_ad_generator import OpenAIAdGenerator, generate_complete_campaign
+# The OpenAI ad generator is imported lazily by get_openai_generator
+from streamlit_setup import get_openai_generator, load_json
+from ui_css import inject_page_css
+from ad_schema import AD_FORMAT_TITLES, to_ad_creative
+from campaign_store import CAMPAIGNS_PATH, append_campaigns, latest_per_client, migrate_legacy_campaigns
 
 # Page configuration
 st.set_page_config(
@@ -18,38 +20,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .success-box {
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .info-box {
-        background-color: #d1ecf1;
-        border: 1px solid #bee5eb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .ad-preview {
-        background-color: #f8f9fa;
-        border: 1px solid #dee2e6;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+inject_page_css()
 
 # Header
 st.title("🤖 OpenAI Ad Generator")
@@ -62,8 +33,7 @@ if not os.path.exists("data/processed_client_data_rag.json"):
 
 # Load processed data
 try:
-    with open("data/processed_client_data_rag.json", 'r', encoding='utf-8') as f:
-        processed_data = json.load(f)
+    processed_data = load_json("data/processed_client_data_rag.json")
     st.success(f"✅ Loaded processed data for {len(processed_data)} clients")
 except Exception as e:
     st.error(f"❌ Error loading processed data: {str(e)}")
@@ -102,6 +72,20 @@ with st.sidebar:
     
     use_rag = st.checkbox("Use RAG Integration", value=True, help="Use vector database for enhanced context")
     
+    stream_output = st.checkbox("Stream Output", value=True, help="Show model output token by token as it is generated")
+    
+    force_regenerate = st.checkbox("Force Regenerate", value=False, help="Ignore cached results for identical requests and call the API again")
+    
+    semantic_threshold = st.slider(
+        "Semantic Cache Threshold", 0.80, 1.00, 0.95, 0.01,
+        help="Reuse a cached campaign when the prompt is at least this similar to an earlier one (RAG only; 1.00 disables)"
+    )
+    
+    max_concurrency = st.slider("Max Concurrent Requests", 1, 10, 5, help="Number of clients generated in parallel")
+    
+    batch_mode = st.checkbox("Batch Mode (up to 24h, 50% cheaper)", value=False,
+                             help="Submit all selected clients as one OpenAI Batch API job and collect the results later")
+    
     st.divider()
     
     # Quick info
@@ -140,6 +124,53 @@ selected_clients = st.multiselect(
     help="Choose which clients to generate ad campaigns for"
 )
 
+def client_record(client_name):
+    """Processed data for a client, with its name (processed_data is keyed by name) as the generators expect"""
+    return {'client_name': client_name, **processed_data[client_name]}
+
+def show_campaigns(campaigns):
+    """Render campaigns that have been appended to the campaign log"""
+    st.success(f"✅ Generated ad campaigns for {len(campaigns)} clients!")
+    st.markdown(f"**Output saved to:** `{CAMPAIGNS_PATH}`")
+    
+    # Store in session state
+    st.session_state.generated_campaigns = campaigns
+    st.session_state.generated_campaigns_path = CAMPAIGNS_PATH
+    
+    # Display results
+    st.header("📢 Generated Ad Campaigns")
+    
+    for campaign in campaigns:
+        client_name = campaign.get('client_name', 'Unknown Client')
+        # Ad formats are nested under ad_creative
+        ad_creative = to_ad_creative(campaign.get('ad_creative'))
+        with st.expander(f"🏢 {client_name}", expanded=True):
+            for ad_format, title in AD_FORMAT_TITLES:
+                ad = getattr(ad_creative, ad_format)
+                if ad is None:
+                    continue
+                
+                st.subheader(title)
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.markdown(f"**Headline:** {ad.headline or 'N/A'}")
+                    st.markdown(f"**Body:** {ad.body or 'N/A'}")
+                
+                with col2:
+                    st.markdown(f"**CTA:** {ad.call_to_action or 'N/A'}")
+                    st.markdown(f"**Image Description:** {ad.image_description or 'N/A'}")
+                
+                # News Connection
+                if ad.news_connection_rationale:
+                    st.markdown(f"**📰 News Connection:** {ad.news_connection_rationale}")
+
+def show_prompt_cache_usage(generator, usage_before):
+    """Show how many prompt tokens of the requests since usage_before OpenAI served from its prompt cache"""
+    prompt_tokens = generator.usage['prompt_tokens'] - usage_before['prompt_tokens']
+    cached_tokens = generator.usage['cached_tokens'] - usage_before['cached_tokens']
+    if prompt_tokens:
+        st.caption(f"⚡ Prompt cache: {cached_tokens:,} of {prompt_tokens:,} prompt tokens cached ({cached_tokens / prompt_tokens:.0%})")
+
 # Generate button
 if st.button("🚀 Generate Ad Campaigns", type="primary"):
     if not selected_clients:
@@ -147,116 +178,119 @@ if st.button("🚀 Generate Ad Campaigns", type="primary"):
     elif not api_key:
         st.warning("⚠️ Please enter your OpenAI API key in the sidebar.")
     else:
-        with st.spinner("Generating ad campaigns..."):
+        # OpenAI ad generator for the sidebar API key (RAG loaded if requested), reused across reruns
+        generator = get_openai_generator(api_key, use_rag)
+        
+        submitted_batch = False
+        if batch_mode:
             try:
-                # Initialize OpenAI ad generator with API key from sidebar
-                generator = OpenAIAdGenerator(api_key=api_key)
-                
-                # Load RAG processor if requested
-                if use_rag:
-                    generator.load_rag_processor()
-                
-                # Generate campaigns for selected clients
-                campaigns = []
-                
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                for i, client_name in enumerate(selected_clients):
-                    status_text.text(f"Generating ads for {client_name}...")
+                batch_id = generator.submit_campaign_batch([client_record(client_name) for client_name in selected_clients])
+                st.session_state.campaign_batch = {'id': batch_id, 'clients': list(selected_clients)}
+                submitted_batch = True
+                st.success(f"📦 Submitted batch `{batch_id}` for {len(selected_clients)} clients. Check its status below.")
+            except Exception as e:
+                st.warning(f"⚠️ Could not submit batch ({str(e)}); generating with regular requests instead.")
+        
+        if not submitted_batch:
+            with st.spinner("Generating ad campaigns..."):
+                try:
+                    # Generate campaigns for selected clients
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
                     
-                    client_data = processed_data[client_name]
+                    # One live output area per client; all clients stream concurrently
+                    live_outputs = []
+                    live_buffers = []
+                    if stream_output:
+                        for client_name in selected_clients:
+                            with st.expander(f"✍️ Live output: {client_name}", expanded=True):
+                                live_outputs.append(st.empty())
+                            live_buffers.append([])
                     
-                    # Generate campaign for this client
-                    campaign = generator.generate_campaign_for_client(client_data)
-                    campaigns.append(campaign)
+                    def render_delta(index, delta):
+                        live_buffers[index].append(delta)
+                        live_outputs[index].code("".join(live_buffers[index]), language="json")
                     
-                    progress_bar.progress((i + 1) / len(selected_clients))
-                
-                # Save campaigns
-                output_path = "generated_ads_text/ad_campaigns.json"
-                os.makedirs("generated_ads_text", exist_ok=True)
-                
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(campaigns, f, indent=2, ensure_ascii=False)
-                
-                st.success(f"✅ Generated ad campaigns for {len(selected_clients)} clients!")
-                st.markdown(f"**Output saved to:** `{output_path}`")
-                
-                # Store in session state
-                st.session_state.generated_campaigns = campaigns
-                st.session_state.generated_campaigns_path = output_path
+                    completed = []
+                    
+                    def update_progress(index, campaign):
+                        # Each campaign is saved as soon as it is done
+                        append_campaigns([campaign])
+                        completed.append(index)
+                        status_text.text(f"Generated ads for {selected_clients[index]} ({len(completed)}/{len(selected_clients)})")
+                        progress_bar.progress(len(completed) / len(selected_clients))
+                    
+                    status_text.text(f"Generating ads for {len(selected_clients)} clients...")
+                    usage_before = dict(generator.usage)
+                    campaigns = generator.generate_campaigns(
+                        [client_record(client_name) for client_name in selected_clients],
+                        max_concurrency=max_concurrency,
+                        on_complete=update_progress,
+                        on_delta=render_delta if stream_output else None,
+                        use_cache=not force_regenerate,
+                        semantic_threshold=semantic_threshold if semantic_threshold < 1.0 else None
+                    )
+                    
+                    show_prompt_cache_usage(generator, usage_before)
+                    show_campaigns(campaigns)
                 
-                # Display results
-                st.header("📢 Generated Ad Campaigns")
+                except Exception as e:
+                    st.error(f"❌ Error generating ad campaigns: {str(e)}")
+                    st.exception(e)
+
+# Pending Batch API job, if one was submitted
+if st.session_state.get('campaign_batch'):
+    pending_batch = st.session_state.campaign_batch
+    st.header("📦 Pending Batch")
+    st.markdown(f"Batch `{pending_batch['id']}` for {len(pending_batch['clients'])} clients")
+    
+    if st.button("🔄 Check Batch Status"):
+        if not api_key:
+            st.warning("⚠️ Please enter your OpenAI API key in the sidebar.")
+        else:
+            try:
+                generator = get_openai_generator(api_key, use_rag)
+                batch = generator.get_campaign_batch(pending_batch['id'])
+                batch_clients = [client_record(client_name) for client_name in pending_batch['clients']]
+                batch_threshold = semantic_threshold if semantic_threshold < 1.0 else None
                 
-                for campaign in campaigns:
-                    client_name = campaign.get('client_name', 'Unknown Client')
-                    with st.expander(f"🏢 {client_name}", expanded=True):
-                        # LinkedIn Ad
-                        if 'linkedin_single_image' in campaign:
-                            st.subheader("💼 LinkedIn Single Image Ad")
-                            linkedin_ad = campaign['linkedin_single_image']
-                            
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.markdown(f"**Headline:** {linkedin_ad.get('headline', 'N/A')}")
-                                st.markdown(f"**Body:** {linkedin_ad.get('body', 'N/A')}")
-                            
-                            with col2:
-                                st.markdown(f"**CTA:** {linkedin_ad.get('call_to_action', 'N/A')}")
-                                st.markdown(f"**Image Description:** {linkedin_ad.get('image_description', 'N/A')}")
-                        
-                        # Banner Ad
-                        if 'banner_ad_300x250' in campaign:
-                            st.subheader("🖼️ Banner Ad (300x250)")
-                            banner_ad = campaign['banner_ad_300x250']
-                            
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.markdown(f"**Headline:** {banner_ad.get('headline', 'N/A')}")
-                                st.markdown(f"**Body:** {banner_ad.get('body', 'N/A')}")
-                            
-                            with col2:
-                                st.markdown(f"**CTA:** {banner_ad.get('call_to_action', 'N/A')}")
-                                st.markdown(f"**Image Description:** {banner_ad.get('image_description', 'N/A')}")
-                        
-                        # Additional Creative
-                        if 'additional_creative' in campaign:
-                            st.subheader("🎨 Additional Creative")
-                            additional_ad = campaign['additional_creative']
-                            
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.markdown(f"**Headline:** {additional_ad.get('headline', 'N/A')}")
-                                st.markdown(f"**Body:** {additional_ad.get('body', 'N/A')}")
-                            
-                            with col2:
-                                st.markdown(f"**CTA:** {additional_ad.get('call_to_action', 'N/A')}")
-                                st.markdown(f"**Image Description:** {additional_ad.get('image_description', 'N/A')}")
-                        
-                        # News Connection
-                        if 'news_connection_rationale' in campaign:
-                            st.markdown(f"**📰 News Connection:** {campaign['news_connection_rationale']}")
+                with st.status(f"Batch status: {batch.status}",
+                               state="complete" if batch.status == "completed" else "running") as status:
+                    if batch.request_counts:
+                        st.write(f"{batch.request_counts.completed}/{batch.request_counts.total} requests completed, "
+                                 f"{batch.request_counts.failed} failed")
+                    
+                    if batch.status == "completed":
+                        campaigns = generator.collect_campaign_batch(batch, batch_clients, max_concurrency=max_concurrency,
+                                                                 semantic_threshold=batch_threshold)
+                    elif batch.status in ("failed", "expired", "cancelled"):
+                        # Fall back to regular concurrent requests
+                        status.update(label=f"Batch {batch.status}; generating with regular requests", state="error")
+                        campaigns = generator.generate_campaigns(batch_clients, max_concurrency=max_concurrency,
+                                                                 semantic_threshold=batch_threshold)
+                    else:
+                        campaigns = None
                 
+                if campaigns is not None:
+                    del st.session_state.campaign_batch
+                    append_campaigns(campaigns)
+                    show_campaigns(campaigns)
             except Exception as e:
-                st.error(f"❌ Error generating ad campaigns: {str(e)}")
-                st.exception(e)
+                st.error(f"❌ Error checking batch: {str(e)}")
 
 # Display existing generated campaigns if available
-if os.path.exists("generated_ads_text/ad_campaigns.json"):
+if migrate_legacy_campaigns():
     st.header("📂 Existing Generated Campaigns")
     st.markdown("Found existing ad campaigns:")
     
     try:
-        with open("generated_ads_text/ad_campaigns.json", 'r', encoding='utf-8') as f:
-            existing_campaigns = json.load(f)
+        existing_campaigns = latest_per_client(load_json(CAMPAIGNS_PATH))
         
         st.success(f"✅ Found {len(existing_campaigns)} generated campaigns")
         
         # Load into session state
         st.session_state.generated_campaigns = existing_campaigns
-        st.session_state.generated_campaigns_path = "generated_ads_text/ad_campaigns.json"
+        st.session_state.generated_campaigns_path = CAMPAIGNS_PATH
         
         # Show preview
         with st.expander("👀 Preview Generated Campaigns"):
@@ -264,9 +298,9 @@ if os.path.exists("generated_ads_text/ad_campaigns.json"):
                 client_name = campaign.get('client_name', 'Unknown Client')
                 st.markdown(f"**{client_name}**")
                 
-                if 'linkedin_single_image' in campaign:
-                    headline = campaign['linkedin_single_image'].get('headline', 'N/A')
-                    st.markdown(f"  LinkedIn: {headline[:60]}...")
+                linkedin_ad = to_ad_creative(campaign.get('ad_creative')).linkedin_single_image
+                if linkedin_ad is not None:
+                    st.markdown(f"  LinkedIn: {(linkedin_ad.headline or 'N/A')[:60]}...")
         
     except Exception as e:
         st.error(f"❌ Error loading existing campaigns: {str(e)}")
@@ -280,15 +314,18 @@ if selected_clients:
         if individual_client and api_key:
             with st.spinner(f"Generating ads for {individual_client}..."):
                 try:
-                    generator = OpenAIAdGenerator(api_key=api_key)
-                    
-                    if use_rag:
-                        generator.load_rag_processor()
+                    generator = get_openai_generator(api_key, use_rag)
                     
-                    client_data = processed_data[individual_client]
-                    campaign = generator.generate_campaign_for_client(client_data)
+                    client_data = client_record(individual_client)
+                    usage_before = dict(generator.usage)
+                    campaign = generator.generate_campaign_for_client(
+                        client_data, stream_handler=st.write_stream if stream_output else None,
+                        use_cache=not force_regenerate,
+                        semantic_threshold=semantic_threshold if semantic_threshold < 1.0 else None
+                    )
                     
                     st.success(f"✅ Generated campaign for {individual_client}")
+                    show_prompt_cache_usage(generator, usage_before)
                     
                     # Display the campaign
                     st.subheader(f"📢 Campaign for {individual_client}")
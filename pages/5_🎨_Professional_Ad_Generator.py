@@ -1,14 +1,15 @@
 import streamlit as st
 import sys
 import os
-import json
 from pathlib import Path
 
 # Add utils directory to path
 sys.path.append(str(Path(__file__).parent.parent / "utils"))
 
-# Import the existing professional ad generation logic
-from professional_ad_generator import ProfessionalAdGenerator
+# The professional ad generator is imported lazily by get_professional_generator
+from streamlit_setup import get_image_work_pool, get_professional_generator, load_json, read_png
+from ui_css import inject_page_css
+from campaign_store import CAMPAIGNS_PATH, latest_per_client, migrate_legacy_campaigns
 
 # Page configuration
 st.set_page_config(
@@ -18,52 +19,20 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .success-box {
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .info-box {
-        background-color: #d1ecf1;
-        border: 1px solid #bee5eb;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        border-radius: 5px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .image-preview {
-        border: 2px solid #dee2e6;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 1rem 0;
-        text-align: center;
-    }
-</style>
-""", unsafe_allow_html=True)
+inject_page_css()
 
 # Header
 st.title("🎨 Professional Ad Generator")
 st.markdown("Create complete visual ads with DALL-E 3 and text overlays")
 
 # Check for generated campaigns
-if not os.path.exists("generated_ads_text/ad_campaigns.json"):
+if not migrate_legacy_campaigns():
     st.error("❌ No generated ad campaigns found. Please run the OpenAI Ad Generator step first.")
     st.stop()
 
 # Load generated campaigns
 try:
-    with open("generated_ads_text/ad_campaigns.json", 'r', encoding='utf-8') as f:
-        generated_campaigns = json.load(f)
+    generated_campaigns = latest_per_client(load_json(CAMPAIGNS_PATH))
     st.success(f"✅ Loaded {len(generated_campaigns)} generated campaigns")
 except Exception as e:
     st.error(f"❌ Error loading generated campaigns: {str(e)}")
@@ -110,6 +79,156 @@ with col2:
     )
     
     save_backgrounds = st.checkbox("Save Background Images", value=True, help="Save background images separately")
+    
+    max_workers = st.slider("Parallel Image Requests", 1, 8, 4, help="Number of DALL-E images generated at the same time (mind your rate limit)")
+    
+    force_regenerate = st.checkbox("Force Regenerate", value=False, help="Ignore cached background images and call DALL-E again")
+
+def image_size_for(ad_format):
+    """DALL-E size selected for an ad format"""
+    if "banner" in ad_format.lower():
+        return image_size_banner
+    if "linkedin" in ad_format.lower():
+        return image_size_linkedin
+    return "1024x1024"
+
+FINAL_ADS_DIR = "generated_ads_images/final_ads"
+AD_FORMATS = ["linkedin_single_image", "banner_ad_300x250", "additional_creative"]
+
+def safe_client_name(client_name):
+    """Client name as it appears in generated filenames"""
+    return client_name.replace(' ', '_').replace('.', '')
+
+@st.cache_data(ttl=2)
+def list_final_ads(dir_mtime):
+    """(name, mtime, size) of every PNG in the final ads folder, newest first.
+    
+    Keyed on the directory mtime, which changes whenever an ad is added or removed;
+    the short ttl picks up ads regenerated in place.
+    """
+    with os.scandir(FINAL_ADS_DIR) as entries:
+        final_ads = []
+        for entry in entries:
+            if entry.name.endswith('.png') and entry.is_file():
+                stat = entry.stat()
+                final_ads.append((entry.name, stat.st_mtime, stat.st_size))
+    final_ads.sort(key=lambda ad: ad[1], reverse=True)
+    return final_ads
+
+def final_ads_by_client():
+    """Final ad filenames grouped by client, newest first within each client"""
+    by_client = {}
+    for image_file, _, _ in list_final_ads(os.stat(FINAL_ADS_DIR).st_mtime):
+        # Filenames look like {client}_{format}_final_{timestamp}.png
+        client_key = image_file.rsplit('_final_', 1)[0]
+        for ad_format in AD_FORMATS:
+            if client_key.endswith(f"_{ad_format}"):
+                client_key = client_key[:-len(ad_format) - 1]
+                break
+        by_client.setdefault(client_key, []).append(image_file)
+    return by_client
+
+def preview_path(image_file):
+    """Smaller WebP copy of a final ad for display, falling back to the PNG for older ads"""
+    web_path = f"{FINAL_ADS_DIR}/{image_file[:-len('.png')]}_web.webp"
+    return web_path if os.path.exists(web_path) else f"{FINAL_ADS_DIR}/{image_file}"
+
+# Galleries are fragments so their download buttons rerun only the gallery,
+# and image bytes come from the cache instead of being reread from disk
+@st.fragment
+def show_client_ads(client_names):
+    """Show the final ads for the given clients with download buttons"""
+    if not os.path.exists(FINAL_ADS_DIR):
+        return
+    
+    images_by_client = final_ads_by_client()
+    
+    if not images_by_client:
+        st.warning("⚠️ No generated images found.")
+        return
+    
+    st.success(f"✅ Found {sum(map(len, images_by_client.values()))} generated ad images")
+    
+    # Group by client
+    for client_name in client_names:
+        client_images = images_by_client.get(safe_client_name(client_name), [])
+        
+        if client_images:
+            with st.expander(f"🏢 {client_name} - {len(client_images)} ads", expanded=True):
+                # Display images in columns
+                cols = st.columns(min(3, len(client_images)))
+                
+                for i, image_file in enumerate(client_images):
+                    col_idx = i % 3
+                    with cols[col_idx]:
+                        st.image(read_png(preview_path(image_file)), caption=image_file, use_column_width=True)
+                        
+                        # Add download button (full-quality PNG)
+                        st.download_button(
+                            label=f"Download {image_file}",
+                            data=read_png(f"{FINAL_ADS_DIR}/{image_file}"),
+                            file_name=image_file,
+                            mime="image/png",
+                            key=f"download_{image_file}"
+                        )
+
+@st.fragment
+def show_image_gallery(client_groups):
+    """Show every existing final ad, grouped by client"""
+    for client_name, images in client_groups.items():
+        st.subheader(f"🏢 {client_name.replace('_', ' ')}")
+        
+        # Display images in rows
+        for i in range(0, len(images), 3):
+            cols = st.columns(3)
+            for j in range(3):
+                if i + j < len(images):
+                    with cols[j]:
+                        st.image(read_png(preview_path(images[i+j])), caption=images[i+j], use_column_width=True)
+
+@st.fragment(run_every=2)
+def show_pending_ads():
+    """Poll the background image jobs, showing ads as they finish"""
+    pending = st.session_state.pending_ads
+    jobs = pending['jobs']
+    finished = [(key, future) for key, future in jobs.items() if future.done()]
+    
+    with st.status(f"Generating visual ads... {len(finished)}/{len(jobs)} done", expanded=True):
+        st.progress(len(finished) / len(jobs))
+        cols = st.columns(3)
+        for i, ((client_name, ad_format), future) in enumerate(finished):
+            with cols[i % 3]:
+                if future.exception() is not None:
+                    st.error(f"❌ {client_name} - {ad_format}: {str(future.exception())}")
+                elif future.result():
+                    ad = future.result()
+                    st.image(read_png(ad.get('web_image') or ad['final_ad']), caption=f"{client_name} - {ad_format}", use_column_width=True)
+                else:
+                    st.error(f"❌ Failed to generate {ad_format} for {client_name}")
+    
+    if len(finished) < len(jobs):
+        return
+    
+    # Everything is done: keep the results and redraw the whole page without the poller
+    generated_images = []
+    errors = []
+    for (client_name, ad_format), future in jobs.items():
+        ad = future.result() if future.exception() is None else None
+        if ad:
+            generated_images.append({
+                'client_name': client_name,
+                'ad_format': ad_format,
+                'ad_data': pending['ad_data'][(client_name, ad_format)],
+                'final_ad': ad['final_ad']
+            })
+        else:
+            errors.append(f"{client_name} - {ad_format}")
+    
+    st.session_state.generated_images = generated_images
+    st.session_state.generated_ad_clients = pending['clients']
+    st.session_state.generated_ad_errors = errors
+    del st.session_state.pending_ads
+    st.rerun()
 
 # Client Selection
 st.header("🎯 Client Selection")
@@ -125,7 +244,7 @@ selected_clients = st.multiselect(
 st.header("📐 Ad Format Selection")
 ad_formats = st.multiselect(
     "Select ad formats to generate:",
-    ["linkedin_single_image", "banner_ad_300x250", "additional_creative"],
+    AD_FORMATS,
     default=["linkedin_single_image", "banner_ad_300x250"],
     help="Choose which ad formats to generate"
 )
@@ -138,129 +257,80 @@ if st.button("🚀 Generate Visual Ads", type="primary"):
         st.warning("⚠️ Please select at least one ad format.")
     elif not api_key and not os.path.exists(".env"):
         st.warning("⚠️ Please provide an OpenAI API key for image generation.")
+    elif st.session_state.get('pending_ads'):
+        st.warning("⚠️ Visual ads are still being generated. Please wait for them to finish.")
     else:
-        with st.spinner("Generating visual ads..."):
-            try:
-                # Initialize professional ad generator
-                generator = ProfessionalAdGenerator(api_key=api_key if api_key else None)
-                
-                # Move data files to organized structure
-                generator.move_data_files()
-                
-                # Filter campaigns for selected clients
-                selected_campaigns = [c for c in generated_campaigns if c.get('client_name') in selected_clients]
-                
-                # Generate visual ads
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                total_ads = len(selected_campaigns) * len(ad_formats)
-                current_ad = 0
-                
-                generated_images = []
-                
-                for campaign in selected_campaigns:
-                    client_name = campaign.get('client_name', 'Unknown Client')
-                    
-                    for ad_format in ad_formats:
-                        if ad_format in campaign:
-                            status_text.text(f"Generating {ad_format} for {client_name}...")
-                            
-                            ad_data = campaign[ad_format]
-                            
-                            # Generate complete ad
-                            success = generator.generate_complete_ad_campaign_for_client(
-                                client_name, ad_data, ad_format
-                            )
-                            
-                            if success:
-                                generated_images.append({
-                                    'client_name': client_name,
-                                    'ad_format': ad_format,
-                                    'ad_data': ad_data
-                                })
-                            
-                            current_ad += 1
-                            progress_bar.progress(current_ad / total_ads)
-                
-                st.success(f"✅ Generated visual ads for {len(selected_clients)} clients!")
-                
-                # Display results
-                st.header("🖼️ Generated Visual Ads")
-                
-                # Show generated images
-                if os.path.exists("generated_ads_images/final_ads"):
-                    image_files = [f for f in os.listdir("generated_ads_images/final_ads") if f.endswith('.png')]
-                    
-                    if image_files:
-                        st.success(f"✅ Found {len(image_files)} generated ad images")
-                        
-                        # Group by client
-                        for client_name in selected_clients:
-                            client_images = [f for f in image_files if client_name.replace(' ', '_') in f]
-                            
-                            if client_images:
-                                with st.expander(f"🏢 {client_name} - {len(client_images)} ads", expanded=True):
-                                    # Display images in columns
-                                    cols = st.columns(min(3, len(client_images)))
-                                    
-                                    for i, image_file in enumerate(client_images):
-                                        col_idx = i % 3
-                                        with cols[col_idx]:
-                                            image_path = f"generated_ads_images/final_ads/{image_file}"
-                                            st.image(image_path, caption=image_file, use_column_width=True)
-                                            
-                                            # Add download button
-                                            with open(image_path, "rb") as file:
-                                                st.download_button(
-                                                    label=f"Download {image_file}",
-                                                    data=file.read(),
-                                                    file_name=image_file,
-                                                    mime="image/png"
-                                                )
-                    else:
-                        st.warning("⚠️ No generated images found.")
-                
-                # Store in session state
-                st.session_state.generated_images = generated_images
-                
-            except Exception as e:
-                st.error(f"❌ Error generating visual ads: {str(e)}")
-                st.exception(e)
+        try:
+            # Initialize professional ad generator
+            generator = get_professional_generator(api_key if api_key else None)
+            
+            # Move data files to organized structure
+            generator.move_data_files()
+            
+            # Filter campaigns for selected clients
+            selected_campaigns = [c for c in generated_campaigns if c.get('client_name') in selected_clients]
+            
+            # Every (client, ad format) pair with creative is an independent DALL-E job
+            ad_data_by_job = {}
+            for campaign in selected_campaigns:
+                client_name = campaign.get('client_name', 'Unknown Client')
+                ad_creative = campaign.get('ad_creative') or {}
+                for ad_format in ad_formats:
+                    if isinstance(ad_creative.get(ad_format), dict):
+                        ad_data_by_job[(client_name, ad_format)] = ad_creative[ad_format]
+            
+            if not ad_data_by_job:
+                st.warning("⚠️ The selected campaigns have no creative for the selected ad formats.")
+            else:
+                # Jobs run on the shared pool; this run returns right away and the poller shows progress
+                pool = get_image_work_pool(max_workers)
+                st.session_state.pending_ads = {
+                    'clients': list(selected_clients),
+                    'ad_data': ad_data_by_job,
+                    'jobs': {
+                        (client_name, ad_format): pool.submit(
+                            generator.generate_complete_ad_campaign_for_client,
+                            client_name, ad_data, ad_format,
+                            size=image_size_for(ad_format), use_cache=not force_regenerate
+                        )
+                        for (client_name, ad_format), ad_data in ad_data_by_job.items()
+                    }
+                }
+                st.session_state.pop('generated_ad_clients', None)
+                st.info(f"🚀 Submitted {len(ad_data_by_job)} ads. You can keep working while they are generated.")
+            
+        except Exception as e:
+            st.error(f"❌ Error generating visual ads: {str(e)}")
+            st.exception(e)
+
+# Background generation in progress
+if st.session_state.get('pending_ads'):
+    show_pending_ads()
+
+# Results of the last completed generation
+if st.session_state.get('generated_ad_clients'):
+    st.success(f"✅ Generated visual ads for {len(st.session_state.generated_ad_clients)} clients!")
+    for failed_job in st.session_state.get('generated_ad_errors', []):
+        st.error(f"❌ Failed to generate {failed_job}")
+    
+    # Display results
+    st.header("🖼️ Generated Visual Ads")
+    
+    # Show generated images
+    show_client_ads(st.session_state.generated_ad_clients)
 
 # Display existing generated images if available
-if os.path.exists("generated_ads_images/final_ads"):
+if os.path.exists(FINAL_ADS_DIR):
     st.header("📂 Existing Generated Images")
     
-    image_files = [f for f in os.listdir("generated_ads_images/final_ads") if f.endswith('.png')]
+    client_groups = final_ads_by_client()
     
-    if image_files:
-        st.success(f"✅ Found {len(image_files)} existing ad images")
+    if client_groups:
+        st.success(f"✅ Found {sum(map(len, client_groups.values()))} existing ad images")
         
         # Show image gallery
         with st.expander("🖼️ Image Gallery", expanded=False):
-            # Group by client
-            client_groups = {}
-            for image_file in image_files:
-                # Extract client name from filename
-                parts = image_file.split('_')
-                if len(parts) >= 2:
-                    client_name = parts[0]
-                    if client_name not in client_groups:
-                        client_groups[client_name] = []
-                    client_groups[client_name].append(image_file)
-            
-            for client_name, images in client_groups.items():
-                st.subheader(f"🏢 {client_name}")
-                
-                # Display images in rows
-                for i in range(0, len(images), 3):
-                    cols = st.columns(3)
-                    for j in range(3):
-                        if i + j < len(images):
-                            with cols[j]:
-                                image_path = f"generated_ads_images/final_ads/{images[i+j]}"
-                                st.image(image_path, caption=images[i+j], use_column_width=True)
+            show_image_gallery(client_groups)
     else:
         st.info("📂 No existing images found in the final_ads directory.")
 
@@ -277,26 +347,22 @@ if selected_clients:
                     # Find the campaign for this client
                     campaign = next((c for c in generated_campaigns if c.get('client_name') == individual_client), None)
                     
-                    if campaign and individual_format in campaign:
-                        generator = ProfessionalAdGenerator(api_key=api_key if api_key else None)
+                    ad_creative = (campaign.get('ad_creative') or {}) if campaign else {}
+                    
+                    if isinstance(ad_creative.get(individual_format), dict):
+                        generator = get_professional_generator(api_key if api_key else None)
                         
-                        ad_data = campaign[individual_format]
-                        success = generator.generate_complete_ad_campaign_for_client(
-                            individual_client, ad_data, individual_format
+                        ad_data = ad_creative[individual_format]
+                        ad = generator.generate_complete_ad_campaign_for_client(
+                            individual_client, ad_data, individual_format,
+                            size=image_size_for(individual_format), use_cache=not force_regenerate
                         )
                         
-                        if success:
+                        if ad:
                             st.success(f"✅ Generated {individual_format} for {individual_client}")
                             
                             # Show the generated image
-                            image_files = [f for f in os.listdir("generated_ads_images/final_ads") 
-                                         if f.endswith('.png') and individual_client.replace(' ', '_') in f 
-                                         and individual_format.replace('_', '') in f]
-                            
-                            if image_files:
-                                latest_image = image_files[-1]  # Get the most recent
-                                image_path = f"generated_ads_images/final_ads/{latest_image}"
-                                st.image(image_path, caption=latest_image, use_column_width=True)
+                            st.image(ad['final_ad'], caption=os.path.basename(ad['final_ad']), use_column_width=True)
                         else:
                             st.error(f"❌ Failed to generate {individual_format} for {individual_client}")
                     else:
@@ -349,19 +415,78 @@ if os.path.exists("generated_ads_images/final_ads"):
     
     # Create zip file of all generated ads
     import zipfile
-    import io
+    import hashlib
+    import tempfile
+    import glob
+    import time
+    
+    # Cached archives (of any session or format) untouched for this long are removed
+    ZIP_MAX_AGE_SECONDS = 24 * 60 * 60
+    
+    zip_contents = st.radio(
+        "ZIP contents",
+        ["Original PNGs", "Web-optimized (WebP)"],
+        horizontal=True,
+        help="Web-optimized ships only the compressed WebP copies of the final ads"
+    )
+    web_optimized = zip_contents == "Web-optimized (WebP)"
+    
+    # Identify the current set of files by (path, mtime, size) so the archive is only
+    # rebuilt when something under generated_ads_images changes
+    ad_files = []
+    for root, dirs, files in os.walk("generated_ads_images"):
+        for file in files:
+            if file.endswith('_web.webp') != web_optimized:
+                continue
+            file_path = os.path.join(root, file)
+            file_stat = os.stat(file_path)
+            ad_files.append((file_path, file_stat.st_mtime, file_stat.st_size))
+    ad_files.sort()
+    
+    signature = hashlib.sha256(repr((web_optimized, ad_files)).encode('utf-8')).hexdigest()[:16]
+    zip_path = os.path.join(tempfile.gettempdir(), f"generated_ad_campaigns_{signature}.zip")
+    
+    def build_zip():
+        """Write the archive for the current file set to zip_path, unless it is already there"""
+        if os.path.exists(zip_path):
+            return
+        
+        # Archives nobody has built for a day belong to file sets that are gone; recent ones
+        # may be another session's or the other format's, so they are left alone
+        for stale_path in glob.glob(os.path.join(tempfile.gettempdir(), "generated_ad_campaigns_*")):
+            try:
+                if time.time() - os.path.getmtime(stale_path) > ZIP_MAX_AGE_SECONDS:
+                    os.remove(stale_path)
+            except OSError:
+                pass
+        
+        # Built on disk rather than in a BytesIO, so the images are not held in memory twice;
+        # a unique temporary name keeps concurrent sessions from writing the same file
+        with tempfile.NamedTemporaryFile(dir=tempfile.gettempdir(), prefix="generated_ad_campaigns_",
+                                         suffix=".part", delete=False) as partial_file:
+            with zipfile.ZipFile(partial_file, 'w') as zip_file:
+                for file_path, _, _ in ad_files:
+                    arc_name = os.path.relpath(file_path, "generated_ads_images")
+                    # PNG and WebP are already compressed; deflating them costs CPU for almost no gain
+                    compression = zipfile.ZIP_STORED if file_path.endswith(('.png', '.webp')) else zipfile.ZIP_DEFLATED
+                    zip_file.write(file_path, arc_name, compress_type=compression)
+        os.replace(partial_file.name, zip_path)
     
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for root, dirs, files in os.walk("generated_ads_images"):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arc_name = os.path.relpath(file_path, "generated_ads_images")
-                zip_file.write(file_path, arc_name)
+    def zip_data():
+        """Archive bytes, read only when the button is clicked rather than on every rerun"""
+        build_zip()
+        try:
+            with open(zip_path, 'rb') as zip_file:
+                return zip_file.read()
+        except FileNotFoundError:
+            # Removed by another session's cleanup between the build and the read
+            build_zip()
+            with open(zip_path, 'rb') as zip_file:
+                return zip_file.read()
     
     st.download_button(
         label="📦 Download All Generated Ads (ZIP)",
-        data=zip_buffer.getvalue(),
-        file_name="generated_ad_campaigns.zip",
+        data=zip_data,
+        file_name="generated_ad_campaigns_web.zip" if web_optimized else "generated_ad_campaigns.zip",
         mime="application/zip"
     ) 
\ No newline at end of file
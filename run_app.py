@@ -3,19 +3,48 @@
 Streamlit App Runner for News-Responsive Ad Generation
 """
 
+import importlib.util
 import subprocess
 import sys
 import os
 from pathlib import Path
 
+# Shares the pipeline's NLTK check: its marker records where the data was found and
+# is only trusted while those paths still exist
+sys.path.append(str(Path(__file__).parent / "utils"))
+from main_pipeline import ensure_nltk_data as record_nltk_data, nltk_data_recorded
+
+STREAMLIT_FLAGS = {
+    "server.port": 8501,
+    "server.address": "localhost",
+    "browser.gatherUsageStats": False,
+}
+
+def ensure_nltk_data():
+    """Make sure the NLTK corpora are available, probing only until their locations are recorded"""
+    if not nltk_data_recorded():
+        # Finds (or downloads) the data and records where it lives
+        record_nltk_data()
+    if nltk_data_recorded():
+        print("✅ NLTK data found")
+        return
+    
+    print("📥 NLTK data not found. Setting up...")
+    try:
+        subprocess.run([sys.executable, "setup_nltk.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("⚠️ NLTK setup failed. You may need to run it manually:")
+        print("   python setup_nltk.py")
+        return
+    record_nltk_data()
+
 def main():
     """Run the Streamlit app"""
     
-    # Check if streamlit is installed
-    try:
-        import streamlit
+    # Check if streamlit is installed (without paying for the import)
+    if importlib.util.find_spec("streamlit") is not None:
         print("✅ Streamlit is installed")
-    except ImportError:
+    else:
         print("❌ Streamlit not found. Installing...")
         subprocess.check_call([sys.executable, "-m", "pip", "install", "streamlit"])
     
@@ -28,29 +57,16 @@ def main():
         Path(dir_name).mkdir(exist_ok=True)
     
     # Check and setup NLTK data
-    try:
-        import nltk
-        nltk.data.find('corpora/stopwords')
-        print("✅ NLTK data found")
-    except LookupError:
-        print("📥 NLTK data not found. Setting up...")
-        try:
-            subprocess.run([sys.executable, "setup_nltk.py"], check=True)
-        except subprocess.CalledProcessError:
-            print("⚠️ NLTK setup failed. You may need to run it manually:")
-            print("   python setup_nltk.py")
+    ensure_nltk_data()
     
     print("🚀 Starting Streamlit app...")
     print("📱 Open your browser to: http://localhost:8501")
     print("📋 Use the sidebar to navigate through the pipeline steps")
     
-    # Run streamlit
-    subprocess.run([
-        sys.executable, "-m", "streamlit", "run", "Home.py",
-        "--server.port", "8501",
-        "--server.address", "localhost",
-        "--browser.gatherUsageStats", "false"
-    ])
+    # Run streamlit in this interpreter rather than starting a second one
+    from streamlit.web import bootstrap
+    bootstrap.load_config_options(flag_options=STREAMLIT_FLAGS)
+    bootstrap.run("Home.py", False, [], STREAMLIT_FLAGS)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -7,6 +7,7 @@ Downloads required NLTK data for RAG processing
 import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 def install_nltk():
     """Install NLTK if not already installed"""
@@ -24,8 +25,36 @@ def install_nltk():
             print("❌ Failed to install NLTK")
             return False
 
+# (download name, resource path) of the NLTK data used by RAG processing
+REQUIRED_DATA = [
+    ('stopwords', 'corpora/stopwords'),
+    ('punkt', 'tokenizers/punkt'),
+    ('punkt_tab', 'tokenizers/punkt_tab')
+]
+
+def download_nltk_data(data_name):
+    """Download one NLTK package, falling back to ./nltk_data"""
+    import nltk
+    
+    try:
+        print(f"📥 Downloading {data_name}...")
+        if not nltk.download(data_name, quiet=True):
+            raise RuntimeError("download failed")
+        print(f"✅ {data_name} downloaded successfully")
+    except Exception as e:
+        print(f"❌ Error downloading {data_name}: {e}")
+        
+        # Try alternative download location
+        try:
+            print(f"🔄 Trying alternative download location for {data_name}...")
+            nltk.download(data_name, download_dir='./nltk_data', quiet=True)
+            print(f"✅ {data_name} downloaded to ./nltk_data/")
+        except Exception as e2:
+            print(f"❌ Failed to download {data_name}: {e2}")
+            print(f"   Please download manually: python -c 'import nltk; nltk.download(\"{data_name}\")'")
+
 def setup_nltk_data():
-    """Download required NLTK data"""
+    """Download required NLTK data that is not already installed"""
     # First ensure NLTK is installed
     if not install_nltk():
         return
@@ -34,52 +63,19 @@ def setup_nltk_data():
     
     print("🔧 Setting up NLTK data for RAG processing...")
     
-    # Required NLTK data
-    required_data = ['stopwords', 'punkt']
-    
-    for data_name in required_data:
+    # A local lookup per package; only missing packages are downloaded
+    pending = []
+    for data_name, resource_path in REQUIRED_DATA:
         try:
-            print(f"📥 Downloading {data_name}...")
-            nltk.download(data_name, quiet=True)
-            print(f"✅ {data_name} downloaded successfully")
-        except Exception as e:
-            print(f"❌ Error downloading {data_name}: {e}")
-            
-            # Try alternative download location
-            try:
-                print(f"🔄 Trying alternative download location for {data_name}...")
-                nltk.download(data_name, download_dir='./nltk_data', quiet=True)
-                print(f"✅ {data_name} downloaded to ./nltk_data/")
-            except Exception as e2:
-                print(f"❌ Failed to download {data_name}: {e2}")
-                print(f"   Please download manually: python -c 'import nltk; nltk.download(\"{data_name}\")'")
+            nltk.data.find(resource_path)
+            print(f"✅ {data_name} already available")
+        except LookupError:
+            pending.append(data_name)
     
-    print("\n🎉 NLTK setup complete!")
-    print("   You can now run the RAG processor without NLTK errors.")
-
-def setup_nltk_data():
-    """Download required NLTK data"""
-    print("🔧 Setting up NLTK data for RAG processing...")
-    
-    # Required NLTK data
-    required_data = ['stopwords', 'punkt']
-    
-    for data_name in required_data:
-        try:
-            print(f"📥 Downloading {data_name}...")
-            nltk.download(data_name, quiet=True)
-            print(f"✅ {data_name} downloaded successfully")
-        except Exception as e:
-            print(f"❌ Error downloading {data_name}: {e}")
-            
-            # Try alternative download location
-            try:
-                print(f"🔄 Trying alternative download location for {data_name}...")
-                nltk.download(data_name, download_dir='./nltk_data', quiet=True)
-                print(f"✅ {data_name} downloaded to ./nltk_data/")
-            except Exception as e2:
-                print(f"❌ Failed to download {data_name}: {e2}")
-                print(f"   Please download manually: python -c 'import nltk; nltk.download(\"{data_name}\")'")
+    if pending:
+        # Downloads are network-bound, so fetch them at the same time
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            list(executor.map(download_nltk_data, pending))
     
     print("\n🎉 NLTK setup complete!")
     print("   You can now run the RAG processor without NLTK errors.")
@@ -3,7 +3,7 @@
 Test script to verify JSON serialization fix for RAG processor
 """
 
-import json
+import orjson
 import sys
 from pathlib import Path
 
@@ -15,7 +15,7 @@ def test_json_serialization():
     print("🧪 Testing JSON serialization...")
     
     try:
-        from rag_processor import process_client_data_with_rag
+        from rag_processor import process_client_data_with_rag, stream_dump_dict
         
         # Test with sample data
         sample_data = [
@@ -35,20 +35,22 @@ def test_json_serialization():
         ]
         
         # Save sample data
-        with open('test_client_data.json', 'w') as f:
-            json.dump(sample_data, f, indent=2)
+        with open('test_client_data.json', 'wb') as f:
+            f.write(orjson.dumps(sample_data, option=orjson.OPT_INDENT_2))
         
         # Process with RAG
         print("📊 Processing sample data with RAG...")
         processed_data = process_client_data_with_rag('test_client_data.json')
         
-        # Test JSON serialization
+        # Writing the file is the serializability check: orjson raises TypeError on
+        # anything it cannot encode, so no separate dumps pass or read-back is needed
         print("💾 Testing JSON serialization...")
-        json_string = json.dumps(processed_data, indent=2, ensure_ascii=False)
-        
-        # Test saving to file
-        with open('test_processed_data.json', 'w', encoding='utf-8') as f:
-            json.dump(processed_data, f, indent=2, ensure_ascii=False)
+        try:
+            with open('test_processed_data.json', 'wb') as f:
+                stream_dump_dict(processed_data, f, indent=True)
+        except TypeError as e:
+            print(f"❌ Processed data is not JSON serializable: {e}")
+            return False
         
         print("✅ JSON serialization successful!")
         print(f"📁 Processed data saved to test_processed_data.json")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Regression test for parsing the repo's client workbook
+"""
+
+import sys
+from pathlib import Path
+
+# Add utils to path
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+WORKBOOK = Path(__file__).parent / "docs" / "URL_and_news_articles_examples_by_client.xlsx"
+
+def parse_with_pandas(file_path):
+    """Reference parse with pandas.read_excel, as parse_client_data did before it streamed rows"""
+    import pandas as pd
+
+    client_data = []
+    for sheet_name, df in pd.read_excel(file_path, sheet_name=None).items():
+        url = None
+        news_articles = []
+        for _, row in df.iterrows():
+            cells = [str(cell).strip() if pd.notna(cell) else "" for cell in row.iloc[:4]]
+            cells += [""] * (4 - len(cells))
+            if str(row.iloc[0]).startswith('URL -'):
+                url = str(row.iloc[0]).replace('URL -', '').strip()
+            elif cells[0] and cells[0].lower() not in ('title', 'total', 'nan'):
+                news_articles.append({"title": cells[0], "source": cells[1],
+                                      "published_date": cells[2], "url": cells[3]})
+        if url and news_articles:
+            client_data.append({"client_name": sheet_name, "url": url, "news_articles": news_articles})
+    return client_data
+
+def test_matches_pandas():
+    """Test that the streaming parser returns exactly what the pandas-based parser returned"""
+    print("🧪 Comparing with the pandas reference parse...")
+
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("  ⚠️ pandas not installed; skipping")
+        return True
+
+    import parse_client_data as parser
+
+    # The openpyxl reader, whether or not calamine is installed
+    calamine_workbook, parser.CalamineWorkbook = parser.CalamineWorkbook, None
+    try:
+        parsed = parser.parse_client_data(str(WORKBOOK))
+    finally:
+        parser.CalamineWorkbook = calamine_workbook
+
+    if parsed != parse_with_pandas(WORKBOOK):
+        print("❌ Parsed data differs from the pandas reference")
+        return False
+    print("  ✅ Identical to the pandas reference")
+    return True
+
+def test_readers_agree():
+    """Test that the calamine and openpyxl readers turn every cell into the same strings"""
+    print("🧪 Comparing the calamine and openpyxl readers...")
+
+    import parse_client_data as parser
+
+    if parser.CalamineWorkbook is None:
+        print("  ⚠️ python-calamine not installed; skipping")
+        return True
+
+    if parser._read_sheets_calamine(str(WORKBOOK)) != parser._read_sheets_openpyxl(str(WORKBOOK)):
+        print("❌ calamine and openpyxl parsed the workbook differently")
+        return False
+    print("  ✅ Both readers parse identically")
+    return True
+
+def test_parse_client_workbook():
+    """Test that every sheet of the example workbook yields a client with its URL and articles"""
+    print("🧪 Testing client workbook parsing...")
+
+    try:
+        import openpyxl
+        from parse_client_data import parse_client_data
+
+        client_data = parse_client_data(str(WORKBOOK))
+        sheet_names = openpyxl.load_workbook(WORKBOOK, read_only=True).sheetnames
+
+        if [client['client_name'] for client in client_data] != sheet_names:
+            print(f"❌ Expected one client per sheet {sheet_names}, got {[c['client_name'] for c in client_data]}")
+            return False
+
+        for client in client_data:
+            if not client['url'].startswith('https://') or not client['news_articles']:
+                print(f"❌ {client['client_name']}: missing URL or news articles")
+                return False
+            print(f"  ✅ {client['client_name']}: {client['url']} ({len(client['news_articles'])} articles)")
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Workbook parsing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    print("🚀 Client Workbook Parsing Test")
+    print("=" * 50)
+
+    success = test_parse_client_workbook() and test_matches_pandas() and test_readers_agree()
+
+    print("\n" + "=" * 50)
+    if success:
+        print("🎉 Client workbook parsing test passed!")
+    else:
+        print("❌ Client workbook parsing test failed.")
+        sys.exit(1)
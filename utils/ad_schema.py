@@ -0,0 +1,145 @@
+"""
+Typed schema for the ad creative returned by the text model
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import msgspec
+
+class Ad(msgspec.Struct):
+    """Copy and visual concept for one ad format"""
+    headline: str = ""
+    body: str = ""
+    call_to_action: str = ""
+    image_description: str = ""
+    news_connection_rationale: str = ""
+
+class AdCreative(msgspec.Struct, omit_defaults=True):
+    """Ad creative for every format of a campaign (formats the model skipped are None)"""
+    linkedin_single_image: Optional[Ad] = None
+    banner_ad_300x250: Optional[Ad] = None
+    additional_creative: Optional[Ad] = None
+
+# (field, heading) for each ad format, in display order
+AD_FORMAT_TITLES = [
+    ('linkedin_single_image', "💼 LinkedIn Single Image Ad"),
+    ('banner_ad_300x250', "🖼️ Banner Ad (300x250)"),
+    ('additional_creative', "🎨 Additional Creative"),
+]
+
+def _strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON schema object in the form OpenAI structured outputs requires in strict mode"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+# JSON schema derived from the structs above, so the model and the decoder share one definition
+AD_JSON_SCHEMA = _strict_object({field: {"type": "string"} for field in Ad.__struct_fields__})
+AD_CREATIVE_JSON_SCHEMA = _strict_object({field: AD_JSON_SCHEMA for field in AdCreative.__struct_fields__})
+
+# response_format for chat completions: the model can only return JSON matching the schema
+AD_CREATIVE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "ad_creative",
+        "schema": AD_CREATIVE_JSON_SCHEMA,
+        "strict": True
+    }
+}
+
+_decoder = msgspec.json.Decoder(AdCreative)
+_ad_decoder = msgspec.json.Decoder(Ad)
+
+def decode_ad_creative(content: str) -> AdCreative:
+    """
+    Decode the model's JSON output straight into an AdCreative
+
+    Args:
+        content: JSON text
+
+    Returns:
+        Decoded ad creative
+
+    Raises:
+        msgspec.DecodeError: If the text is not valid JSON
+        msgspec.ValidationError: If the JSON does not match the schema
+    """
+    return _decoder.decode(content)
+
+def to_ad_creative(data: Optional[Dict[str, Any]]) -> AdCreative:
+    """Ad creative from a stored campaign's 'ad_creative' dict"""
+    return msgspec.convert(data or {}, AdCreative, strict=False)
+
+def to_dict(ad_creative: AdCreative) -> Dict[str, Any]:
+    """Plain dict for JSON storage; formats the model skipped are left out"""
+    return msgspec.to_builtins(ad_creative)
+
+class AdCreativeStreamParser:
+    """
+    Incremental parser for AdCreative JSON arriving in streamed deltas
+    
+    Tracks string and nesting state across deltas; each ad format is decoded as soon as its
+    object closes, so parsing overlaps with the rest of the response still streaming in
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.value_start = 0
+        self.key = None
+        self.formats: Dict[str, Ad] = {}
+    
+    def feed(self, delta: str) -> List[Tuple[str, Ad]]:
+        """
+        Consume the next piece of streamed text
+        
+        Args:
+            delta: Text delta from the stream
+            
+        Returns:
+            (field, Ad) for each ad format completed by this delta
+        """
+        start = len(self.text)
+        self.text += delta
+        completed = []
+        for i in range(start, len(self.text)):
+            char = self.text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    # At the top level, strings are the format names
+                    if self.depth == 1:
+                        self.key = msgspec.json.decode(self.text[self.string_start:i + 1])
+            elif char == '"':
+                self.in_string = True
+                self.string_start = i
+            elif char == '{':
+                self.depth += 1
+                if self.depth == 2:
+                    self.value_start = i
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 1 and self.key in AdCreative.__struct_fields__:
+                    try:
+                        ad = _ad_decoder.decode(self.text[self.value_start:i + 1])
+                    except msgspec.DecodeError:
+                        continue
+                    self.formats[self.key] = ad
+                    completed.append((self.key, ad))
+        return completed
+    
+    def result(self) -> Optional[AdCreative]:
+        """The ad creative if every format has been parsed, otherwise None"""
+        if len(self.formats) < len(AdCreative.__struct_fields__):
+            return None
+        return AdCreative(**self.formats)
@@ -0,0 +1,90 @@
+"""
+Append-only storage for generated ad campaigns
+Campaigns are stored one per line in a JSON Lines file, so each finished
+campaign is appended instead of rewriting every campaign generated so far
+"""
+
+import os
+import orjson
+from typing import Any, Dict, Iterable, List
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends of a single line are still written in one call
+    fcntl = None
+
+CAMPAIGNS_PATH = "generated_ads_text/ad_campaigns.jsonl"
+LEGACY_CAMPAIGNS_PATH = "generated_ads_text/ad_campaigns.json"
+
+def append_campaigns(campaigns: Iterable[Dict[str, Any]], path: str = CAMPAIGNS_PATH):
+    """
+    Append campaigns to the campaign log
+    The lines are written in one call under an exclusive lock, so concurrent
+    writers never interleave partial lines
+
+    Args:
+        campaigns: Campaigns to append
+        path: JSON Lines file to append to
+    """
+    data = b"".join(orjson.dumps(campaign) + b"\n" for campaign in campaigns)
+    if not data:
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'ab') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.write(data)
+            f.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def migrate_legacy_campaigns(path: str = CAMPAIGNS_PATH) -> bool:
+    """
+    Convert the old single-document ad_campaigns.json into the campaign log, once
+
+    Returns:
+        True if a campaign log exists afterwards
+    """
+    if not os.path.exists(path) and os.path.exists(LEGACY_CAMPAIGNS_PATH):
+        with open(LEGACY_CAMPAIGNS_PATH, 'rb') as f:
+            append_campaigns(orjson.loads(f.read()), path)
+        print(f"📦 Migrated {LEGACY_CAMPAIGNS_PATH} to {path}")
+    return os.path.exists(path)
+
+def latest_per_client(campaigns: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reduce the campaign log to the most recent campaign for each client
+
+    Args:
+        campaigns: Campaigns in the order they were appended
+
+    Returns:
+        One campaign per client, in order of each client's first appearance
+    """
+    latest = {}
+    for campaign in campaigns:
+        latest[campaign.get('client_name')] = campaign
+    return list(latest.values())
+
+def load_campaigns(path: str = CAMPAIGNS_PATH) -> List[Dict[str, Any]]:
+    """
+    Load the most recent campaign for each client from the campaign log
+
+    Args:
+        path: JSON Lines campaign log
+
+    Returns:
+        List of campaigns (empty if nothing has been generated yet)
+    """
+    if not migrate_legacy_campaigns(path):
+        return []
+
+    campaigns = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                campaigns.append(orjson.loads(line))
+    return latest_per_client(campaigns)
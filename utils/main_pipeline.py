@@ -2,54 +2,151 @@
 Main Pipeline for Alphix ML Challenge: News-Responsive Ad Generation
 Orchestrates the complete workflow from data parsing to ad generation
 """
+import os
 import sys
-import json
-import time
+import asyncio
+import argparse
+from time import perf_counter
+import shutil
+import hashlib
+import threading
+import importlib.util
 from pathlib import Path
+from typing import List
+
+# Every package the pipeline and app need, installed in one pip run
+REQUIREMENTS_FILE = Path(__file__).resolve().parent.parent / 'requirements.txt'
+
+# Import names of requirements whose distribution name differs from the module name
+DISTRIBUTION_MODULES = {
+    'python-calamine': 'python_calamine',
+    'beautifulsoup4': 'bs4',
+    'sentence-transformers': 'sentence_transformers',
+    'rake-nltk': 'rake_nltk',
+    'google-re2': 're2',
+    'faiss-cpu': 'faiss',
+    'python-dotenv': 'dotenv',
+    'Pillow': 'PIL',
+}
+
+def required_modules() -> List[str]:
+    """Import names of everything listed in requirements.txt"""
+    modules = []
+    for line in REQUIREMENTS_FILE.read_text(encoding='utf-8').splitlines():
+        # Drop comments, environment markers, extras and version specifiers
+        name = line.split('#', 1)[0].split(';', 1)[0].strip()
+        for separator in ('[', '=', '<', '>', '!', '~', ' '):
+            name = name.split(separator, 1)[0]
+        if name:
+            modules.append(DISTRIBUTION_MODULES.get(name, name.replace('-', '_')))
+    return modules
+
+# (resource path, download name) of the NLTK data the pipeline uses
+NLTK_RESOURCES = [
+    ('corpora/stopwords', 'stopwords'),
+    ('tokenizers/punkt', 'punkt'),
+    ('tokenizers/punkt_tab', 'punkt_tab')
+]
+
+# Records where the NLTK data was found, so warm runs skip the probe (see ensure_nltk_data)
+NLTK_MARKER = Path('data/.nltk_ready')
+
+# Scraped landing page text, one file per URL, reused across pipeline runs
+SCRAPE_CACHE_DIR = Path('data/scrape_cache')
+
+def scrape_cache_path(url: str) -> Path:
+    """Cache file for a URL's scraped text"""
+    return SCRAPE_CACHE_DIR / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.txt"
+
+# Seconds taken by each step of the current run, in the order the steps ran
+_STAGE_TIMINGS = {}
+
+def requirements_installed() -> bool:
+    """Check that every required package is importable, without paying for the imports"""
+    return all(importlib.util.find_spec(name) is not None for name in required_modules())
 
 def install_requirements():
     """Install required packages"""
     print("🔧 Installing required packages...")
     import subprocess
     
-    packages = [
-        'pandas', 'openpyxl', 'requests', 'beautifulsoup4', 
-        'sentence-transformers', 'rake-nltk', 'nltk', 
-        'faiss-cpu', 'openai', 'scikit-learn', 'python-dotenv'
-    ]
+    # One pip run over requirements.txt resolves and downloads everything together;
+    # wheels are preferred so nothing is built from source when a wheel exists
+    env = {**os.environ, 'PIP_NO_PYTHON_VERSION_WARNING': '1'}
+    result = subprocess.run([sys.executable, '-m', 'pip', 'install',
+                             '--disable-pip-version-check', '--no-input', '--prefer-binary',
+                             '-r', str(REQUIREMENTS_FILE)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=env)
+    if result.returncode != 0:
+        print(f"  ⚠️  Failed to install packages:\n{result.stderr.strip()}")
     
-    for package in packages:
-        try:
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', package], 
-                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except:
-            print(f"  ⚠️  Failed to install {package}")
+    print("  ✅ Package installation complete")
+
+def nltk_data_recorded() -> bool:
+    """Whether NLTK_MARKER lists where the NLTK data was found and all of those paths still exist"""
+    if not NLTK_MARKER.exists():
+        return False
+    recorded = NLTK_MARKER.read_text(encoding='utf-8').splitlines()
+    return bool(recorded) and all(os.path.exists(path) for path in recorded)
+
+def ensure_nltk_data():
+    """
+    Download the NLTK data the pipeline uses, skipping resources that are already present
+    Once everything is found, the resolved locations are recorded in NLTK_MARKER; later runs
+    only check those paths still exist, without importing nltk or consulting its index
+    """
+    if nltk_data_recorded():
+        return
     
-    # Download NLTK data
     try:
         import nltk
-        nltk.download('stopwords', quiet=True)
-        nltk.download('punkt', quiet=True)
-        nltk.download('punkt_tab', quiet=True)
-    except:
-        pass
+    except ImportError:
+        return
     
-    print("  ✅ Package installation complete")
+    found = []
+    for resource_path, name in NLTK_RESOURCES:
+        try:
+            found.append(nltk.data.find(resource_path))
+        except LookupError:
+            nltk.download(name, quiet=True)
+            try:
+                found.append(nltk.data.find(resource_path))
+            except LookupError:
+                print(f"  ⚠️  NLTK resource '{name}' is unavailable")
+    
+    if len(found) == len(NLTK_RESOURCES):
+        # Directory pointers have a path; resources found inside a zip point at the archive
+        paths = [pointer.path if hasattr(pointer, 'path') else pointer.zipfile.filename for pointer in found]
+        NLTK_MARKER.write_text("\n".join(paths), encoding='utf-8')
+
+def load_step(module_name: str, function_name: str):
+    """
+    Import a step's entry point when the step runs
+    Earlier steps and the prerequisite checks then don't pay for heavy imports
+    such as sentence-transformers, and an import failure fails only its step
+    """
+    return getattr(importlib.import_module(module_name), function_name)
 
 def run_step(step_name: str, step_function, *args, **kwargs):
     """Run a pipeline step with error handling and timing"""
     print(f"\n🚀 {step_name}...")
-    start_time = time.time()
+    start_time = perf_counter()
+    result, error = None, None
     
     try:
         result = step_function(*args, **kwargs)
-        elapsed = time.time() - start_time
-        print(f"  ✅ {step_name} completed in {elapsed:.1f}s")
-        return result, True
     except Exception as e:
-        elapsed = time.time() - start_time
-        print(f"  ❌ {step_name} failed after {elapsed:.1f}s: {e}")
+        error = e
+    finally:
+        # Monotonic clock: wall-clock adjustments can't skew the timing
+        elapsed = perf_counter() - start_time
+        _STAGE_TIMINGS[step_name] = round(elapsed, 3)
+    
+    if error is not None:
+        print(f"  ❌ {step_name} failed after {elapsed:.1f}s: {error}")
         return None, False
+    print(f"  ✅ {step_name} completed in {elapsed:.1f}s")
+    return result, True
 
 def check_input_files():
     """Check if required input files exist"""
@@ -73,13 +170,40 @@ def check_input_files():
     
     return True
 
-def main():
+def parse_args(argv=None):
+    """Command line options for the pipeline"""
+    parser = argparse.ArgumentParser(description="Run the news-responsive ad generation pipeline")
+    parser.add_argument('--legacy-json', action='store_true',
+                        help="Also write data/client_data_with_content.json as a single JSON document")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Discard cached landing page text and scrape every page again")
+    parser.add_argument('--pretty', action='store_true',
+                        help="Indent the intermediate JSON files (compact by default)")
+    parser.add_argument('--batch', action='store_true',
+                        help="Generate ads through the OpenAI Batch API: half the token cost, "
+                             "but results can take up to 24 hours")
+    parser.add_argument('--semantic-cache', type=float, nargs='?', const=0.97, default=None, metavar='THRESHOLD',
+                        help="Reuse ads generated for near-duplicate prompts (cosine similarity >= THRESHOLD, "
+                             "default 0.97); without this flag only identical prompts are reused")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Maximum number of clients whose ads are generated concurrently "
+                             "(default: $OPENAI_CONCURRENCY or 5)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main pipeline execution"""
+    args = parse_args(argv)
+    # PIPELINE_DUMP_INTERMEDIATES=0 skips files no later step reads back
+    dump_intermediates = os.environ.get('PIPELINE_DUMP_INTERMEDIATES', '1') == '1'
+    
     print("=" * 60)
     print("🎯 ALPHIX ML CHALLENGE: NEWS-RESPONSIVE AD GENERATION")
     print("🤖 RAG-Enabled Pipeline with OpenAI Integration")
     print("=" * 60)
     
+    # Output directory for every step
+    os.makedirs('data', exist_ok=True)
+    
     # Check prerequisites
     if not check_input_files():
         print("\n❌ Missing required input files. Please ensure you have:")
@@ -87,19 +211,18 @@ def main():
         print("   - Alphix_ML_Challenge_News_Ad_Generation.docx")
         return
     
-    # Install requirements
-    install_requirements()
+    # Install requirements (only when something is missing)
+    if requirements_installed():
+        print("✅ Required packages already installed")
+    else:
+        install_requirements()
+    ensure_nltk_data()
     
-    # Import modules after installation
-    try:
-        from parse_client_data import parse_client_data
-        from web_scraper import scrape_text_from_url
-        from rag_processor import process_client_data_with_rag
-        from openai_ad_generator import generate_complete_campaign
-    except ImportError as e:
-        print(f"❌ Import error: {e}")
-        print("Please ensure all required packages are installed.")
-        return
+    # Imported only now: on a fresh environment these are among the packages just installed
+    import orjson
+    import zstandard
+    # Intermediate files are read by the next step, so they are written compact unless asked otherwise
+    json_option = orjson.OPT_INDENT_2 if args.pretty else None
     
     pipeline_success = True
     
@@ -107,16 +230,16 @@ def main():
     print("\n" + "="*50)
     parsed_data, success = run_step(
         "STEP 1: Parsing client data from Excel",
-        lambda: parse_client_data('URL_and_news_articles_examples_by_client.xlsx')
+        lambda: load_step('parse_client_data', 'parse_client_data')('URL_and_news_articles_examples_by_client.xlsx')
     )
     
     if not success:
         return
     
-    # Save parsed data
-    os.makedirs('data', exist_ok=True)
-    with open('data/parsed_client_data.json', 'w') as f:
-        json.dump(parsed_data, f, indent=2)
+    # Step 2 uses parsed_data in memory; the file is only for inspection and the app pages
+    if dump_intermediates:
+        with open('data/parsed_client_data.json', 'wb') as f:
+            f.write(orjson.dumps(parsed_data, option=json_option))
     
     print(f"  📊 Parsed data for {len(parsed_data)} clients")
     for client in parsed_data:
@@ -126,32 +249,87 @@ def main():
     print("\n" + "="*50)
     print("🚀 STEP 2: Scraping client landing pages...")
     
+    try:
+        scrape_all_urls = load_step('web_scraper', 'scrape_all_urls')
+        content_path = load_step('web_scraper', 'CLIENT_CONTENT_PATH')
+    except ImportError as e:
+        print(f"❌ Import error: {e}")
+        print("Please ensure all required packages are installed.")
+        return
+    
+    # Load the embedding model and RAKE while the network-bound scraping runs
+    rag_warmup = {}
+    
+    def warm_rag_processor():
+        try:
+            rag_warmup['processor'] = load_step('rag_processor', 'RAGProcessor')()
+        except Exception as e:
+            # Step 3 creates the processor itself and reports the error
+            print(f"  ⚠️  RAG warm-up failed: {e}")
+    
+    warmup_thread = threading.Thread(target=warm_rag_processor, name="rag-warmup", daemon=True)
+    warmup_thread.start()
+    
+    if args.refresh and SCRAPE_CACHE_DIR.exists():
+        shutil.rmtree(SCRAPE_CACHE_DIR)
+    SCRAPE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    
     scraped_count = 0
-    for client in parsed_data:
-        url = client['url']
-        print(f"  🌐 Scraping {client['client_name']}: {url}")
-        
-        content = scrape_text_from_url(url)
+    
+    # One client per line, written as soon as its page is scraped (same file as the app's scraper page)
+    content_file = zstandard.ZstdCompressor(level=3).stream_writer(open(content_path, 'wb'))
+    
+    def record_content(index, content):
+        nonlocal scraped_count
+        client = parsed_data[index]
         client['landing_page_content'] = content
+        content_file.write(orjson.dumps(client) + b"\n")
         
         if content:
             scraped_count += 1
-            print(f"    ✅ Success: {len(content)} characters")
+            print(f"    ✅ {client['client_name']}: {len(content)} characters")
         else:
-            print(f"    ⚠️  Failed to scrape content")
+            print(f"    ⚠️  {client['client_name']}: Failed to scrape content")
+    
+    try:
+        # Pages scraped on an earlier run are read from the cache
+        to_scrape = []
+        for index, client in enumerate(parsed_data):
+            cache_path = scrape_cache_path(client['url'])
+            if cache_path.exists():
+                record_content(index, cache_path.read_text(encoding='utf-8'))
+            else:
+                to_scrape.append(index)
+        
+        def scrape_complete(position, content):
+            index = to_scrape[position]
+            if content:
+                scrape_cache_path(parsed_data[index]['url']).write_text(content, encoding='utf-8')
+            record_content(index, content)
+        
+        # The rest are fetched at once; each result is recorded as it arrives
+        if to_scrape:
+            print(f"  🌐 Scraping {len(to_scrape)} landing pages concurrently "
+                  f"({len(parsed_data) - len(to_scrape)} cached)")
+            asyncio.run(scrape_all_urls([parsed_data[index]['url'] for index in to_scrape],
+                                        on_complete=scrape_complete))
+    finally:
+        content_file.close()
     
-    # Save data with content
-    with open('data/client_data_with_content.json', 'w', encoding='utf-8') as f:
-        json.dump(parsed_data, f, indent=2, ensure_ascii=False)
+    if args.legacy_json:
+        with open('data/client_data_with_content.json', 'wb') as f:
+            f.write(orjson.dumps(parsed_data, option=json_option))
     
     print(f"  📊 Successfully scraped {scraped_count}/{len(parsed_data)} landing pages")
     
     # Step 3: Build RAG system and process data
     print("\n" + "="*50)
+    warmup_thread.join()
     rag_result, success = run_step(
         "STEP 3: Building RAG vector database and processing",
-        process_client_data_with_rag,
-        'data/client_data_with_content.json'
+        lambda: load_step('rag_processor', 'process_client_data_with_rag')(content_path, batch_size=64,
+                                                                          client_data=parsed_data,
+                                                                          rag_processor=rag_warmup.get('processor'))
     )
     
     if not success:
@@ -159,6 +337,11 @@ def main():
     else:
         print(f"  🔍 Processed {len(rag_result)} clients with RAG")
         
+        # Step 4 reads the processed data from disk
+        stream_dump_dict = load_step('rag_processor', 'stream_dump_dict')
+        with open('data/processed_client_data_rag.json', 'wb') as f:
+            stream_dump_dict(rag_result, f, indent=args.pretty)
+        
         for client_name, client_data in rag_result.items():
             rel_news = len(client_data.get('relevant_news', []))
             keywords = len(client_data.get('landing_page_keywords', []))
@@ -168,8 +351,11 @@ def main():
     print("\n" + "="*50)
     campaigns, success = run_step(
         "STEP 4: Generating AI-powered ad campaigns",
-        generate_complete_campaign,
-        'data/processed_client_data_rag.json'
+        lambda: load_step('openai_ad_generator', 'generate_complete_campaign')('data/processed_client_data_rag.json',
+                                                                       max_workers=args.workers,
+                                                                       use_batch=args.batch,
+                                                                       semantic_threshold=args.semantic_cache,
+                                                                       rag_processor=rag_warmup.get('processor'))
     )
     
     if not success:
@@ -195,11 +381,11 @@ def main():
         print("\nGenerated Files:")
         files = [
             ('parsed_client_data.json', 'Parsed Excel data'),
-            ('client_data_with_content.json', 'Data with scraped content'),
+            ('data/client_data_with_content.jsonl.zst', 'Data with scraped content'),
             ('data/processed_client_data_rag.json', 'RAG-processed data'),
             ('generated_ads_text/generated_ad_campaigns.json', 'Final ad campaigns'),
             ('data/vector_index.faiss', 'Vector database index'),
-            ('data/vector_metadata.pkl', 'Vector database metadata')
+            ('data/vector_metadata.parquet', 'Vector database metadata')
         ]
         
         for filename, description in files:
@@ -224,6 +410,7 @@ def main():
         print("⚠️  PIPELINE COMPLETED WITH ERRORS")
         print("Some steps failed. Check the error messages above.")
     
+    print(f"\n⏱️  Stage timings (s): {orjson.dumps(_STAGE_TIMINGS).decode()}")
     print("="*60)
 
 if __name__ == "__main__":
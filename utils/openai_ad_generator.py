@@ -2,13 +2,37 @@
 OpenAI-Powered Ad Generator with RAG Integration
 Generates context-aware ad creative using real OpenAI API
 """
+import asyncio
+import hashlib
 import json
+import math
 import os
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
-from rag_processor import RAGProcessor
+import random
+import threading
+import weakref
+from functools import lru_cache
+import msgspec
+import numpy as np
+import orjson
+import faiss
+import httpx
+from typing import List, Dict, Any, Optional, Callable, Iterator, AsyncIterator, Tuple
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, APITimeoutError, RateLimitError
+from ad_schema import AD_CREATIVE_RESPONSE_FORMAT, AdCreativeStreamParser, decode_ad_creative, to_dict
 import time
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    # HTTP/2 lets concurrent requests share one TLS connection (needs the h2 package)
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -18,10 +42,196 @@ except ImportError:
     print("⚠️  python-dotenv not installed. Install with: pip install python-dotenv")
     print("   Or set environment variables manually")
 
+@lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """Tokenizer for a model, loaded once per process (None if tiktoken is not installed)"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text: str, model: str) -> int:
+    """Number of tokens in text (about 4 characters per token without tiktoken)"""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+def trim_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Cut text to at most max_tokens tokens
+    
+    Args:
+        text: Text to trim
+        max_tokens: Token budget
+        model: Model whose tokenizer sets the budget
+        
+    Returns:
+        The leading part of text that fits the budget
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+class SemanticCache:
+    """
+    Locality-sensitive hash index over request embeddings, mapping a near-duplicate
+    request for the same client to the cache file of an earlier completion
+    
+    Each embedding is reduced to NBITS signs of random projections; the fraction of
+    differing bits estimates the angle between two prompts, so cosine similarity is
+    approximated as cos(pi * hamming / NBITS)
+    """
+    NBITS = 256
+    # Nearest stored prompts examined per lookup for one belonging to the same client
+    CANDIDATES = 8
+    
+    def __init__(self, cache_dir: str, dimension: int):
+        self.index_path = os.path.join(cache_dir, "semantic_index.faiss")
+        self.keys_path = os.path.join(cache_dir, "semantic_keys.json")
+        self.lock = threading.Lock()
+        
+        if os.path.exists(self.index_path) and os.path.exists(self.keys_path):
+            self.index = faiss.read_index(self.index_path)
+            with open(self.keys_path, 'rb') as f:
+                self.keys = orjson.loads(f.read())
+        else:
+            self.index = faiss.IndexLSH(dimension, self.NBITS, True)
+            self.keys = []
+    
+    def lookup(self, vector: np.ndarray, threshold: float, client_name: str) -> Optional[str]:
+        """
+        Cache key of the most similar stored prompt for the same client, if its estimated
+        cosine similarity >= threshold; another client's campaign is never reused
+        """
+        with self.lock:
+            if not self.keys:
+                return None
+            distances, indices = self.index.search(vector.reshape(1, -1), min(self.CANDIDATES, len(self.keys)))
+            for distance, index in zip(distances[0], indices[0]):
+                if index < 0 or math.cos(math.pi * distance / self.NBITS) < threshold:
+                    break
+                # Entries are [cache key, client name]; bare keys from older caches have no client
+                entry = self.keys[index]
+                if isinstance(entry, list) and entry[1] == client_name:
+                    return entry[0]
+            return None
+    
+    def add(self, vector: np.ndarray, key: str, client_name: str):
+        """Record a prompt embedding and persist the index"""
+        with self.lock:
+            self.index.add(vector.reshape(1, -1))
+            self.keys.append([key, client_name])
+            faiss.write_index(self.index, self.index_path)
+            with open(self.keys_path, 'wb') as f:
+                f.write(orjson.dumps(self.keys))
+
+class RateLimiter:
+    """
+    Token bucket over requests per minute and tokens per minute
+    
+    Both capacities refill continuously up to one minute's allowance; a request waits
+    until there is room for it in both. Shared by every event loop of a generator.
+    """
+    
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_request_capacity = requests_per_minute
+        self.available_token_capacity = tokens_per_minute
+        self.last_update = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _try_acquire(self, tokens: float) -> float:
+        """Take capacity for one request if available; otherwise return the seconds to wait"""
+        with self.lock:
+            now = time.monotonic()
+            elapsed = now - self.last_update
+            self.last_update = now
+            self.available_request_capacity = min(
+                self.requests_per_minute,
+                self.available_request_capacity + elapsed * self.requests_per_minute / 60
+            )
+            self.available_token_capacity = min(
+                self.tokens_per_minute,
+                self.available_token_capacity + elapsed * self.tokens_per_minute / 60
+            )
+            
+            # A request larger than a minute's allowance proceeds once the bucket is full
+            tokens = min(tokens, self.tokens_per_minute)
+            if self.available_request_capacity >= 1 and self.available_token_capacity >= tokens:
+                self.available_request_capacity -= 1
+                self.available_token_capacity -= tokens
+                return 0.0
+            
+            request_wait = (1 - self.available_request_capacity) * 60 / self.requests_per_minute
+            token_wait = (tokens - self.available_token_capacity) * 60 / self.tokens_per_minute
+            return max(request_wait, token_wait, 0.0)
+    
+    async def acquire(self, tokens: float):
+        """Wait until one request of about `tokens` tokens fits within both limits"""
+        while (wait := self._try_acquire(tokens)) > 0:
+            await asyncio.sleep(wait)
+
 class OpenAIAdGenerator:
     # Model Configuration - Using the latest and best OpenAI models
     TEXT_MODEL = "gpt-4o"  # Latest GPT-4 Omni model (May 2024) - best for reasoning and complex tasks
     IMAGE_MODEL = "dall-e-3"  # Latest DALL-E 3 model - best for image generation
+    TEMPERATURE = 0.7
+    MAX_TOKENS = 1500  # Three ads of short copy; the response schema keeps output from running on
+    CAMPAIGN_CACHE_DIR = "campaign_cache"
+    # Prompt budgets, in tokens of TEXT_MODEL
+    LANDING_SUMMARY_TOKENS = 400
+    NEWS_TITLE_TOKENS = 40
+    # Default cap on concurrent OpenAI requests when generating many clients
+    MAX_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "5"))
+    # Account limits the async path paces itself to, and attempts per request on 429s/timeouts
+    MAX_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_MAX_RPM", "500"))
+    MAX_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_MAX_TPM", "30000"))
+    MAX_ATTEMPTS = 5
+    
+    # Identical for every request and sent first, so OpenAI's prompt caching can reuse it as a shared prefix
+    SYSTEM_PROMPT = """You are a creative marketing assistant for leading global asset management firms. Your task is to generate compelling, compliant ad creative that connects client investment insights with current market news.
+
+Key Requirements:
+- Maintain professional, authoritative, and accessible tone
+- Ensure compliance with financial industry regulations
+- Focus on thought leadership and valuable insights
+- Avoid specific performance guarantees or overly promotional language
+- Create timely, relevant content that resonates with institutional investors
+
+Ad Format Guidelines:
+- LinkedIn Single Image: Headline (150 chars max), Body (600 chars max), CTA, Image description
+- Banner Ad 300x250: Headline (50 chars max), Body (100 chars max), CTA, Image description
+- All content should demonstrate clear connection between client message and news themes
+
+**Task:** For the client context and news in the user message, generate ad creative for the following formats that meaningfully connects the client's expertise with the current news landscape:
+
+1. **LinkedIn Single Image Ad:**
+   - Headline (max 150 characters)
+   - Body (max 600 characters) 
+   - Call-to-Action
+   - Image Description (detailed visual concept)
+
+2. **Banner Ad 300x250:**
+   - Headline (max 50 characters)
+   - Body (max 100 characters)
+   - Call-to-Action
+   - Image Description (detailed visual concept)
+
+3. **Additional Creative Concept:**
+   - Provide one additional innovative ad format or approach
+
+**Requirements:**
+- Connect client expertise with at least one news item
+- Maintain compliance and professional tone
+- Focus on thought leadership, not direct selling
+- Ensure headlines are compelling and news-responsive
+- Make the connection between news and client value clear"""
     
     def __init__(self, api_key: str = None):
         """
@@ -30,6 +240,8 @@ class OpenAIAdGenerator:
         Args:
             api_key: OpenAI API key (if None, will try to get from environment variable OPENAI_API_KEY)
         """
+        os.makedirs(self.CAMPAIGN_CACHE_DIR, exist_ok=True)
+        
         if api_key is None:
             api_key = os.getenv('OPENAI_API_KEY')
         
@@ -43,35 +255,95 @@ class OpenAIAdGenerator:
             self.client = OpenAI(api_key=api_key)
             print("✅ OpenAI client initialized successfully")
         
+        # Async clients for generating several campaigns concurrently, one per event loop:
+        # their connection pools cannot be reused once the loop that opened them has closed
+        self._async_clients = weakref.WeakKeyDictionary()
+        self.rate_limiter = RateLimiter(self.MAX_REQUESTS_PER_MINUTE, self.MAX_TOKENS_PER_MINUTE)
         self.rag_processor = None
+        self.semantic_cache = None
+        self._semantic_cache_lock = threading.Lock()
+        # Running token totals, including how many prompt tokens OpenAI served from its prompt cache
+        self.usage = {'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0}
+        self._usage_lock = threading.Lock()
     
-    def load_rag_processor(self):
-        """Load RAG processor for enhanced context"""
-        self.rag_processor = RAGProcessor()
-        if not self.rag_processor.load_index():
-            print("Warning: No vector database found. Some features may be limited.")
+    def _get_async_client(self) -> AsyncOpenAI:
+        """Get the async OpenAI client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            # One pooled connection set for every concurrent request on this loop
+            http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)
+            )
+            # Retries are handled by _acreate, after waiting on the rate limiter
+            self._async_clients[loop] = AsyncOpenAI(api_key=self.client.api_key, http_client=http_client,
+                                                    max_retries=0)
+        return self._async_clients[loop]
     
-    def create_system_prompt(self) -> str:
-        """Create system prompt for ad generation"""
-        return """You are a creative marketing assistant for leading global asset management firms. Your task is to generate compelling, compliant ad creative that connects client investment insights with current market news.
-
-Key Requirements:
-- Maintain professional, authoritative, and accessible tone
-- Ensure compliance with financial industry regulations
-- Focus on thought leadership and valuable insights
-- Avoid specific performance guarantees or overly promotional language
-- Create timely, relevant content that resonates with institutional investors
-
-Ad Format Guidelines:
-- LinkedIn Single Image: Headline (150 chars max), Body (600 chars max), CTA, Image description
-- Banner Ad 300x250: Headline (50 chars max), Body (100 chars max), CTA, Image description
-- All content should demonstrate clear connection between client message and news themes
-
-Output format: Return valid JSON with structured ad content."""
+    async def _acreate(self, messages: List[Dict[str, str]], **kwargs):
+        """
+        Chat completion on the async client, paced by the rate limiter
+        Rate-limit, timeout and connection errors are retried with exponential backoff and jitter
+        """
+        # Prompt size plus the completion budget
+        estimated_tokens = sum(count_tokens(message['content'], self.TEXT_MODEL) for message in messages) + self.MAX_TOKENS
+        
+        for attempt in range(self.MAX_ATTEMPTS):
+            await self.rate_limiter.acquire(estimated_tokens)
+            try:
+                return await self._get_async_client().chat.completions.create(
+                    model=self.TEXT_MODEL,
+                    messages=messages,
+                    temperature=self.TEMPERATURE,
+                    max_tokens=self.MAX_TOKENS,
+                    response_format=AD_CREATIVE_RESPONSE_FORMAT,
+                    **kwargs
+                )
+            except (RateLimitError, APITimeoutError, APIConnectionError) as e:
+                if attempt == self.MAX_ATTEMPTS - 1:
+                    raise
+                delay = 2 ** attempt + random.random()
+                print(f"⚠️ {type(e).__name__}; retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    async def aclose(self):
+        """Close the running event loop's async client and its connections"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+    
+    def _record_usage(self, usage):
+        """Add a response's token usage to the running totals"""
+        if usage is None:
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        with self._usage_lock:
+            self.usage['prompt_tokens'] += usage.prompt_tokens or 0
+            self.usage['cached_tokens'] += (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+            self.usage['completion_tokens'] += usage.completion_tokens or 0
+    
+    def load_rag_processor(self, rag_processor=None):
+        """
+        Load RAG processor for enhanced context
+        
+        Args:
+            rag_processor: Already initialized RAGProcessor to share (e.g. the one that built the
+                index), instead of loading the embedding model again
+        """
+        if rag_processor is None:
+            # Imported here so the embedding model stack is only loaded when RAG is used
+            from rag_processor import RAGProcessor
+            rag_processor = RAGProcessor()
+        self.rag_processor = rag_processor
+        if self.rag_processor.index is None and not self.rag_processor.load_index():
+            print("Warning: No vector database found. Some features may be limited.")
     
     def create_ad_prompt(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> str:
         """
-        Create detailed prompt for ad generation
+        Create the client-specific prompt for ad generation
+        The task and format instructions are identical for every client, so they live in the
+        system prompt; keeping them as a shared prefix lets OpenAI's prompt caching reuse them
         
         Args:
             client_data: Client information and landing page content
@@ -86,12 +358,16 @@ Output format: Return valid JSON with structured ad content."""
         keywords = client_data.get('landing_page_keywords', [])
         
         # Format landing page summary
-        landing_summary = landing_page_content[:800] if landing_page_content else "Investment expertise and market insights"
+        if landing_page_content:
+            landing_summary = trim_to_tokens(landing_page_content, self.LANDING_SUMMARY_TOKENS, self.TEXT_MODEL)
+        else:
+            landing_summary = "Investment expertise and market insights"
         
         # Format top news articles
         news_context = []
         for i, news in enumerate(relevant_news[:3]):
-            news_context.append(f"{i+1}. {news.get('title', 'Market Development')} (Source: {news.get('source', 'Financial News')}) - Relevance: {news.get('similarity_score', 0.5):.2f}")
+            title = trim_to_tokens(news.get('title', 'Market Development'), self.NEWS_TITLE_TOKENS, self.TEXT_MODEL)
+            news_context.append(f"{i+1}. {title} (Source: {news.get('source', 'Financial News')}) - Relevance: {news.get('similarity_score', 0.5):.2f}")
         
         prompt = f"""
 **Client Context:**
@@ -105,42 +381,194 @@ Landing Page URL: {client_data.get('url', '')}
 
 **Relevant Market News (Ranked by Relevance):**
 {chr(10).join(news_context)}
-
-**Task:** Generate ad creative for the following formats that meaningfully connects the client's expertise with the current news landscape:
-
-1. **LinkedIn Single Image Ad:**
-   - Headline (max 150 characters)
-   - Body (max 600 characters) 
-   - Call-to-Action
-   - Image Description (detailed visual concept)
-
-2. **Banner Ad 300x250:**
-   - Headline (max 50 characters)
-   - Body (max 100 characters)
-   - Call-to-Action
-   - Image Description (detailed visual concept)
-
-3. **Additional Creative Concept:**
-   - Provide one additional innovative ad format or approach
-
-**Requirements:**
-- Connect client expertise with at least one news item
-- Maintain compliance and professional tone
-- Focus on thought leadership, not direct selling
-- Ensure headlines are compelling and news-responsive
-- Make the connection between news and client value clear
-
-**Output:** Return as JSON with keys: "linkedin_single_image", "banner_ad_300x250", "additional_creative", each containing "headline", "body", "call_to_action", "image_description", and "news_connection_rationale".
 """
         return prompt
     
-    def generate_ad_creative(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    def _create_messages(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build the chat messages for an ad generation request"""
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": self.create_ad_prompt(client_data, relevant_news)}
+        ]
+    
+    @staticmethod
+    def _decode_content(content: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Decode the model's JSON output (constrained by AD_CREATIVE_RESPONSE_FORMAT) into ad creative
+        
+        Returns:
+            Ad creative dict, or None if the model refused, returned nothing or was cut off at max_tokens
+        """
+        if not content:
+            return None
+        try:
+            return to_dict(decode_ad_creative(content))
+        except msgspec.DecodeError:
+            return None
+    
+    def _finish_generation(self, content: Optional[str], cache_path: str, prompt_vector: Optional[np.ndarray],
+                           client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Decode fresh model output and cache it only if it decoded
+        Unusable output is not stored, so the next identical request calls the API again
+        instead of reading back a response that can only ever produce the mock
+        """
+        ad_creative = self._decode_content(content)
+        if ad_creative is None:
+            print("⚠️ Model output could not be decoded; using mock ad creative")
+            return self._generate_mock_response(client_data, relevant_news)
+        self._store_cache(cache_path, content, prompt_vector, client_data)
+        return ad_creative
+    
+    def _cache_path(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Path of the cached model output for a request
+        Content-addressed on everything that determines the completion, so a changed
+        prompt, news context (e.g. RAG on/off) or model setting is a cache miss
+        """
+        # Stdlib json on purpose: its exact output is the cache key, so switching
+        # serializers would orphan every cached completion
+        request = json.dumps({
+            'model': self.TEXT_MODEL,
+            'messages': messages,
+            'temperature': self.TEMPERATURE,
+            'max_tokens': self.MAX_TOKENS,
+            'response_format': AD_CREATIVE_RESPONSE_FORMAT
+        }, sort_keys=True)
+        key = hashlib.sha256(request.encode('utf-8')).hexdigest()
+        return os.path.join(self.CAMPAIGN_CACHE_DIR, f"{key}.txt")
+    
+    def _read_cache(self, cache_path: str) -> Optional[str]:
+        """Cached model output, or None on a miss"""
+        if not os.path.exists(cache_path):
+            return None
+        print(f"♻️  Reusing cached ad creative ({os.path.basename(cache_path)[:12]})")
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def _write_cache(self, cache_path: str, content: str):
+        """Store model output; written under a temporary name and renamed into place"""
+        partial_path = f"{cache_path}.part"
+        with open(partial_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(partial_path, cache_path)
+    
+    def _semantic_key_text(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> str:
+        """
+        Text embedded for semantic cache lookups: the news titles the prompt uses plus the client fields
+        The full prompt opens with the landing page summary, which alone fills MiniLM's 256 word-piece
+        window, so the news that distinguishes one request from the next would be truncated away;
+        three trimmed titles, the name and eight keywords stay well inside it
+        """
+        titles = '; '.join(trim_to_tokens(news.get('title', ''), self.NEWS_TITLE_TOKENS, self.TEXT_MODEL)
+                           for news in relevant_news[:3])
+        keywords = ', '.join(client_data.get('landing_page_keywords', [])[:8])
+        return f"News: {titles}\nClient: {client_data.get('client_name', '')}\nKeywords: {keywords}"
+    
+    def _lookup_exact(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]], use_cache: bool,
+                      semantic_threshold: Optional[float]) -> Tuple[str, Optional[str], bool]:
+        """
+        Look up stored output for an identical request
+        
+        Returns:
+            Tuple of (exact cache path, cached content or None, whether to try a semantic match)
+        """
+        messages = self._create_messages(client_data, relevant_news)
+        cache_path = self._cache_path(messages)
+        if not use_cache:
+            return cache_path, None, False
+        
+        content = self._read_cache(cache_path)
+        # Semantic hits are scoped to a client, so a request without a client name never uses them
+        semantic = (content is None and semantic_threshold is not None and self.rag_processor is not None
+                    and bool(client_data.get('client_name')))
+        return cache_path, content, semantic
+    
+    def _embed_request(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> np.ndarray:
+        """Embed a request for the semantic cache; the RAG embedding model is already loaded, so this is cheap"""
+        return np.asarray(self.rag_processor.model.encode(
+            self._semantic_key_text(client_data, relevant_news), normalize_embeddings=True), dtype='float32')
+    
+    def _lookup_semantic(self, prompt_vector: np.ndarray, semantic_threshold: float,
+                         client_data: Dict[str, Any]) -> Optional[str]:
+        """Stored output of a near-duplicate earlier request for the same client, if any"""
+        with self._semantic_cache_lock:
+            if self.semantic_cache is None:
+                self.semantic_cache = SemanticCache(self.CAMPAIGN_CACHE_DIR, len(prompt_vector))
+        
+        key = self.semantic_cache.lookup(prompt_vector, semantic_threshold, client_data['client_name'])
+        return self._read_cache(os.path.join(self.CAMPAIGN_CACHE_DIR, key)) if key is not None else None
+    
+    def _lookup_cache(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]], use_cache: bool,
+                      semantic_threshold: Optional[float]) -> Tuple[str, Optional[str], Optional[np.ndarray]]:
+        """
+        Look up stored output for a request: exact match first, then (optionally) semantic match
+        
+        Returns:
+            Tuple of (exact cache path, cached content or None, prompt embedding or None)
+        """
+        cache_path, content, semantic = self._lookup_exact(client_data, relevant_news, use_cache, semantic_threshold)
+        if not semantic:
+            return cache_path, content, None
+        prompt_vector = self._embed_request(client_data, relevant_news)
+        return cache_path, self._lookup_semantic(prompt_vector, semantic_threshold, client_data), prompt_vector
+    
+    async def _alookup_cache(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]], use_cache: bool,
+                             semantic_threshold: Optional[float]) -> Tuple[str, Optional[str], Optional[np.ndarray]]:
+        """_lookup_cache for the async path; the embedding runs in a worker thread, off the event loop"""
+        cache_path, content, semantic = self._lookup_exact(client_data, relevant_news, use_cache, semantic_threshold)
+        if not semantic:
+            return cache_path, content, None
+        prompt_vector = await asyncio.to_thread(self._embed_request, client_data, relevant_news)
+        return cache_path, self._lookup_semantic(prompt_vector, semantic_threshold, client_data), prompt_vector
+    
+    def _store_cache(self, cache_path: str, content: str, prompt_vector: Optional[np.ndarray],
+                     client_data: Dict[str, Any]):
+        """Store model output, and index its request embedding for semantic lookups"""
+        self._write_cache(cache_path, content)
+        if prompt_vector is not None:
+            self.semantic_cache.add(prompt_vector, os.path.basename(cache_path), client_data['client_name'])
+    
+    def stream_ad_creative(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> Iterator[str]:
+        """
+        Stream ad creative text from OpenAI as it is generated
+        
+        Args:
+            client_data: Client information
+            relevant_news: Relevant news articles
+            
+        Yields:
+            Text deltas of the model response
+        """
+        stream = self.client.chat.completions.create(
+            model=self.TEXT_MODEL,
+            messages=self._create_messages(client_data, relevant_news),
+            temperature=self.TEMPERATURE,
+            max_tokens=self.MAX_TOKENS,
+            response_format=AD_CREATIVE_RESPONSE_FORMAT,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # The final chunk carries the usage for the whole request
+            self._record_usage(chunk.usage)
+    
+    def generate_ad_creative(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]],
+                             stream_handler: Optional[Callable[[Iterator[str]], str]] = None,
+                             use_cache: bool = True, semantic_threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Generate ad creative using OpenAI API
         
         Args:
             client_data: Client information
             relevant_news: Relevant news articles
+            stream_handler: Optional callable that consumes streamed text deltas and
+                returns the full text (e.g. st.write_stream); parsing happens once the stream closes
+            use_cache: Reuse the stored output of an identical earlier request instead of calling the API
+            semantic_threshold: If set (and RAG is loaded), also reuse the output of a request whose
+                prompt embedding has at least this cosine similarity
             
         Returns:
             Generated ad creative or None if failed
@@ -148,36 +576,91 @@ Landing Page URL: {client_data.get('url', '')}
         if not self.client:
             return self._generate_mock_response(client_data, relevant_news)
         
+        cache_path, content, prompt_vector = self._lookup_cache(client_data, relevant_news, use_cache, semantic_threshold)
+        # A stored response that does not decode is treated as a miss and regenerated
+        cached = self._decode_content(content)
+        if cached is not None:
+            return cached
+        
         try:
-            system_prompt = self.create_system_prompt()
-            user_prompt = self.create_ad_prompt(client_data, relevant_news)
+            if stream_handler is not None:
+                content = stream_handler(self.stream_ad_creative(client_data, relevant_news))
+            else:
+                response = self.client.chat.completions.create(
+                    model=self.TEXT_MODEL,
+                    messages=self._create_messages(client_data, relevant_news),
+                    temperature=self.TEMPERATURE,
+                    max_tokens=self.MAX_TOKENS,
+                    response_format=AD_CREATIVE_RESPONSE_FORMAT
+                )
+                content = response.choices[0].message.content
+                self._record_usage(response.usage)
             
-            response = self.client.chat.completions.create(
-                model=self.TEXT_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
-            )
+            return self._finish_generation(content, cache_path, prompt_vector, client_data, relevant_news)
+                
+        except Exception as e:
+            print(f"Error generating ad creative: {e}")
+            return self._generate_mock_response(client_data, relevant_news)
+    
+    async def astream_ad_creative(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Async version of stream_ad_creative"""
+        stream = await self._acreate(
+            self._create_messages(client_data, relevant_news),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # The final chunk carries the usage for the whole request
+            self._record_usage(chunk.usage)
+    
+    async def agenerate_ad_creative(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]],
+                                    on_delta: Optional[Callable[[str], None]] = None,
+                                    use_cache: bool = True, semantic_threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Generate ad creative using the async OpenAI client
+        
+        Args:
+            client_data: Client information
+            relevant_news: Relevant news articles
+            on_delta: Optional callback invoked with each streamed text delta
+            use_cache: Reuse the stored output of an identical earlier request instead of calling the API
+            semantic_threshold: If set (and RAG is loaded), also reuse the output of a request whose
+                prompt embedding has at least this cosine similarity
             
-            # Parse JSON response
-            content = response.choices[0].message.content
+        Returns:
+            Generated ad creative or None if failed
+        """
+        if not self.client:
+            return self._generate_mock_response(client_data, relevant_news)
+        
+        cache_path, content, prompt_vector = await self._alookup_cache(client_data, relevant_news, use_cache, semantic_threshold)
+        # A stored response that does not decode is treated as a miss and regenerated
+        cached = self._decode_content(content)
+        if cached is not None:
+            return cached
+        
+        try:
+            if on_delta is not None:
+                # Formats are decoded as they complete, while the rest of the response streams in
+                parser = AdCreativeStreamParser()
+                async for delta in self.astream_ad_creative(client_data, relevant_news):
+                    parser.feed(delta)
+                    on_delta(delta)
+                content = parser.text
+                
+                ad_creative = parser.result()
+                if ad_creative is not None:
+                    self._store_cache(cache_path, content, prompt_vector, client_data)
+                    return to_dict(ad_creative)
+                # Incomplete stream: decoding the whole text decides whether it is cached
+            else:
+                response = await self._acreate(self._create_messages(client_data, relevant_news))
+                content = response.choices[0].message.content
+                self._record_usage(response.usage)
             
-            # Try to extract JSON from response
-            try:
-                # Look for JSON in the response
-                start_idx = content.find('{')
-                end_idx = content.rfind('}') + 1
-                if start_idx != -1 and end_idx > start_idx:
-                    json_content = content[start_idx:end_idx]
-                    return json.loads(json_content)
-                else:
-                    # If no JSON found, create structured response
-                    return self._parse_text_response(content, client_data, relevant_news)
-            except json.JSONDecodeError:
-                return self._parse_text_response(content, client_data, relevant_news)
+            return self._finish_generation(content, cache_path, prompt_vector, client_data, relevant_news)
                 
         except Exception as e:
             print(f"Error generating ad creative: {e}")
@@ -213,11 +696,6 @@ Landing Page URL: {client_data.get('url', '')}
             }
         }
     
-    def _parse_text_response(self, content: str, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Parse text response if JSON parsing fails"""
-        # This is a fallback - in practice, you'd implement more sophisticated parsing
-        return self._generate_mock_response(client_data, relevant_news)
-    
     def enhance_with_rag(self, client_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Use RAG to find additional relevant context
@@ -244,27 +722,272 @@ Landing Page URL: {client_data.get('url', '')}
         
         return enhanced_results
     
-    def generate_campaign_for_client(self, client_data: Dict[str, Any]) -> Dict[str, Any]:
+    def enhance_with_rag_batch(self, clients: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        enhance_with_rag for many clients: all queries are embedded together and searched in one call
+        
+        Args:
+            clients: Client information, one entry per client
+            
+        Returns:
+            Relevant news per client, in the same order as clients
+        """
+        if not self.rag_processor or self.rag_processor.index is None:
+            return [client_data.get('relevant_news', []) for client_data in clients]
+        
+        # Same query construction as enhance_with_rag
+        queries = [
+            f"{' '.join(client_data.get('landing_page_keywords', [])[:3])} {client_data.get('landing_page_content', '')[:200]}"
+            for client_data in clients
+        ]
+        return self.rag_processor.semantic_search_batch(queries, k=8, filter_type='news_article')
+    
+    def generate_campaign_for_client(self, client_data: Dict[str, Any],
+                                     stream_handler: Optional[Callable[[Iterator[str]], str]] = None,
+                                     use_cache: bool = True,
+                                     semantic_threshold: Optional[float] = None,
+                                     relevant_news: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Generate complete ad campaign for a client
         
         Args:
             client_data: Client information with relevant news
+            stream_handler: Optional consumer for streamed model output (see generate_ad_creative)
+            use_cache: Reuse stored output for an identical request (False forces regeneration)
+            semantic_threshold: Similarity for reusing near-duplicate requests (see generate_ad_creative)
+            relevant_news: News already retrieved for this client (see enhance_with_rag_batch)
             
         Returns:
             Complete campaign with multiple ad formats
         """
         print(f"\n🎯 Generating ads for {client_data.get('client_name', 'Client')}")
         
-        # Enhance with RAG if available
-        if self.rag_processor:
-            relevant_news = self.enhance_with_rag(client_data)
-        else:
-            relevant_news = client_data.get('relevant_news', [])
+        if relevant_news is None:
+            relevant_news = self._get_relevant_news(client_data)
         
         # Generate primary ad creative
-        primary_ads = self.generate_ad_creative(client_data, relevant_news[:3])
+        primary_ads = self.generate_ad_creative(client_data, relevant_news[:3], stream_handler=stream_handler,
+                                                use_cache=use_cache, semantic_threshold=semantic_threshold)
         
+        return self._build_campaign(client_data, relevant_news, primary_ads)
+    
+    async def agenerate_campaign_for_client(self, client_data: Dict[str, Any],
+                                            on_delta: Optional[Callable[[str], None]] = None,
+                                            use_cache: bool = True,
+                                            semantic_threshold: Optional[float] = None,
+                                            relevant_news: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Async version of generate_campaign_for_client
+        
+        Args:
+            client_data: Client information with relevant news
+            on_delta: Optional callback invoked with each streamed text delta
+            use_cache: Reuse stored output for an identical request (False forces regeneration)
+            semantic_threshold: Similarity for reusing near-duplicate requests (see generate_ad_creative)
+            relevant_news: News already retrieved for this client (see enhance_with_rag_batch)
+            
+        Returns:
+            Complete campaign with multiple ad formats
+        """
+        print(f"\n🎯 Generating ads for {client_data.get('client_name', 'Client')}")
+        
+        if relevant_news is None:
+            relevant_news = self._get_relevant_news(client_data)
+        primary_ads = await self.agenerate_ad_creative(client_data, relevant_news[:3], on_delta=on_delta,
+                                                       use_cache=use_cache, semantic_threshold=semantic_threshold)
+        
+        return self._build_campaign(client_data, relevant_news, primary_ads)
+    
+    async def agenerate_campaigns(self, clients: List[Dict[str, Any]], max_concurrency: Optional[int] = None,
+                                  on_complete: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+                                  on_delta: Optional[Callable[[int, str], None]] = None,
+                                  use_cache: bool = True,
+                                  semantic_threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Generate campaigns for many clients concurrently
+        
+        Args:
+            clients: Client information with relevant news, one entry per client
+            max_concurrency: Maximum number of OpenAI requests in flight (default MAX_CONCURRENCY)
+            on_complete: Optional callback invoked with (index, campaign) as each client succeeds
+            on_delta: Optional callback invoked with (index, text delta) while output streams in
+            use_cache: Reuse stored output for identical requests (False forces regeneration)
+            semantic_threshold: Similarity for reusing near-duplicate requests (see generate_ad_creative)
+            
+        Returns:
+            Campaigns in the same order as clients; a client whose generation raised is left out
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.MAX_CONCURRENCY)
+        campaigns = [None] * len(clients)
+        # Retrieve news for every client in one batched search before fanning out
+        news_per_client = self.enhance_with_rag_batch(clients)
+        
+        async def generate_indexed(i):
+            handler = (lambda delta: on_delta(i, delta)) if on_delta is not None else None
+            try:
+                async with semaphore:
+                    return i, await self.agenerate_campaign_for_client(clients[i], on_delta=handler, use_cache=use_cache,
+                                                                       semantic_threshold=semantic_threshold,
+                                                                       relevant_news=news_per_client[i])
+            except Exception as e:
+                # One failing client must not cancel the others
+                print(f"Error generating campaign for {clients[i].get('client_name', 'Client')}: {e}")
+                return i, None
+        
+        for finished in asyncio.as_completed([generate_indexed(i) for i in range(len(clients))]):
+            i, campaign = await finished
+            campaigns[i] = campaign
+            if on_complete is not None and campaign is not None:
+                on_complete(i, campaign)
+        
+        return [campaign for campaign in campaigns if campaign is not None]
+    
+    def generate_campaigns(self, clients: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        """
+        Run agenerate_campaigns on a new event loop and close that loop's async client afterwards
+        
+        Args:
+            clients: Client information with relevant news, one entry per client
+            **kwargs: Options passed through to agenerate_campaigns
+            
+        Returns:
+            Campaigns as returned by agenerate_campaigns
+        """
+        async def generate_all():
+            try:
+                return await self.agenerate_campaigns(clients, **kwargs)
+            finally:
+                await self.aclose()
+        
+        return asyncio.run(generate_all())
+    
+    def submit_campaign_batch(self, clients: List[Dict[str, Any]]) -> str:
+        """
+        Submit campaign generation for many clients as one OpenAI Batch API job
+        Batches complete within 24 hours at half the token price of regular requests
+        
+        Args:
+            clients: Client information with relevant news, one entry per client
+            
+        Returns:
+            Batch ID to poll with get_campaign_batch
+        """
+        lines = []
+        for i, (client_data, relevant_news) in enumerate(zip(clients, self.enhance_with_rag_batch(clients))):
+            lines.append(orjson.dumps({
+                'custom_id': str(i),
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': self.TEXT_MODEL,
+                    'messages': self._create_messages(client_data, relevant_news[:3]),
+                    'temperature': self.TEMPERATURE,
+                    'max_tokens': self.MAX_TOKENS,
+                    'response_format': AD_CREATIVE_RESPONSE_FORMAT
+                }
+            }))
+        
+        batch_file = self.client.files.create(
+            file=("campaign_batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"📦 Submitted batch {batch.id} for {len(clients)} clients")
+        return batch.id
+    
+    def get_campaign_batch(self, batch_id: str):
+        """Current state of a submitted batch (status is e.g. 'in_progress', 'completed' or 'failed')"""
+        return self.client.batches.retrieve(batch_id)
+    
+    def collect_campaign_batch(self, batch, clients: List[Dict[str, Any]], max_concurrency: Optional[int] = None,
+                               semantic_threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Build campaigns from a completed batch
+        
+        Batch outputs are stored in the campaign cache under the same key as the
+        equivalent regular request, then campaigns are assembled through the normal
+        concurrent path, where those are cache hits; a client whose batch request
+        failed is generated there with a regular request instead.
+        
+        Args:
+            batch: Completed batch (from get_campaign_batch)
+            clients: The clients passed to submit_campaign_batch, in the same order
+            max_concurrency: Concurrency for regenerating failed requests (see agenerate_campaigns)
+            semantic_threshold: Similarity for reusing near-duplicate requests (see generate_ad_creative)
+            
+        Returns:
+            Campaigns in the same order as clients (see agenerate_campaigns)
+        """
+        news_per_client = self.enhance_with_rag_batch(clients)
+        if batch.output_file_id:
+            output = self.client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                result = orjson.loads(line)
+                response = result.get('response') or {}
+                if response.get('status_code') != 200:
+                    continue
+                i = int(result['custom_id'])
+                client_data, relevant_news = clients[i], news_per_client[i]
+                content = response['body']['choices'][0]['message']['content']
+                # Only outputs that decode are cached; the rest are regenerated below
+                if self._decode_content(content) is None:
+                    continue
+                self._write_cache(self._cache_path(self._create_messages(client_data, relevant_news[:3])), content)
+        
+        return self.generate_campaigns(clients, max_concurrency=max_concurrency,
+                                       semantic_threshold=semantic_threshold)
+    
+    def generate_campaigns_batch(self, clients: List[Dict[str, Any]], poll_interval: float = 30,
+                                 max_concurrency: Optional[int] = None,
+                                 semantic_threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Generate campaigns for many clients through the Batch API, waiting for the batch to finish
+        Suited to offline whole-corpus runs, where cost matters more than latency
+        
+        Args:
+            clients: Client information with relevant news, one entry per client
+            poll_interval: Seconds between batch status checks
+            max_concurrency: Concurrency for the regular-request fallback (see agenerate_campaigns)
+            semantic_threshold: Similarity for reusing near-duplicate requests (see generate_ad_creative)
+            
+        Returns:
+            Campaigns in the same order as clients
+        """
+        if not self.client:
+            return self.generate_campaigns(clients, max_concurrency=max_concurrency,
+                                           semantic_threshold=semantic_threshold)
+        
+        batch_id = self.submit_campaign_batch(clients)
+        while True:
+            batch = self.get_campaign_batch(batch_id)
+            if batch.status == "completed":
+                return self.collect_campaign_batch(batch, clients, max_concurrency=max_concurrency,
+                                                   semantic_threshold=semantic_threshold)
+            if batch.status in ("failed", "expired", "cancelled"):
+                print(f"⚠️  Batch {batch_id} {batch.status}; generating with regular requests")
+                return self.generate_campaigns(clients, max_concurrency=max_concurrency,
+                                               semantic_threshold=semantic_threshold)
+            
+            counts = batch.request_counts
+            if counts is not None:
+                print(f"  ⏳ Batch {batch.status}: {counts.completed}/{counts.total} requests done")
+            time.sleep(poll_interval)
+    
+    def _get_relevant_news(self, client_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Relevant news for a client, enhanced with RAG if available"""
+        if self.rag_processor:
+            return self.enhance_with_rag(client_data)
+        return client_data.get('relevant_news', [])
+    
+    def _build_campaign(self, client_data: Dict[str, Any], relevant_news: List[Dict[str, Any]],
+                        primary_ads: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Wrap generated ad creative with campaign metadata"""
         # Add metadata
         campaign = {
             'client_name': client_data.get('client_name'),
@@ -288,50 +1011,49 @@ Landing Page URL: {client_data.get('url', '')}
         
         return campaign
 
-def generate_complete_campaign(processed_data_file: str = 'data/processed_client_data_rag.json') -> List[Dict[str, Any]]:
+def generate_complete_campaign(processed_data_file: str = 'data/processed_client_data_rag.json',
+                               max_workers: Optional[int] = None,
+                               use_batch: bool = False,
+                               semantic_threshold: Optional[float] = None,
+                               rag_processor=None) -> List[Dict[str, Any]]:
     """
     Generate complete ad campaigns for all clients
     
     Args:
         processed_data_file: Path to processed client data
+        max_workers: Maximum number of clients generated concurrently
+            (default OpenAIAdGenerator.MAX_CONCURRENCY, set by OPENAI_CONCURRENCY)
+        use_batch: Submit all clients as one Batch API job (half price, may take hours)
+        semantic_threshold: Reuse the output of an earlier request whose prompt embedding has at least
+            this cosine similarity (e.g. 0.97); None reuses exact matches only
+        rag_processor: Already initialized RAGProcessor to share instead of loading a new one
         
     Returns:
         List of complete campaigns
     """
     # Load processed data
     try:
-        with open(processed_data_file, 'r', encoding='utf-8') as f:
-            processed_data = json.load(f)
+        with open(processed_data_file, 'rb') as f:
+            processed_data = orjson.loads(f.read())
     except FileNotFoundError:
         print("Please run rag_processor.py first to generate processed data")
         return []
     
     # Initialize generator
     generator = OpenAIAdGenerator()  # Using placeholder API key
-    generator.load_rag_processor()
+    generator.load_rag_processor(rag_processor)
     
-    # Generate campaigns
-    campaigns = []
-    print("=== GENERATING AD CAMPAIGNS ===")
+    # Add client_name to the data for compatibility
+    clients = [{'client_name': client_name, **client_data} for client_name, client_data in processed_data.items()]
     
-    for client_name, client_data in processed_data.items():
-        try:
-            # Add client_name to the data for compatibility
-            client_data_with_name = {
-                'client_name': client_name,
-                **client_data
-            }
-            
-            campaign = generator.generate_campaign_for_client(client_data_with_name)
-            campaigns.append(campaign)
-            
-            # Add small delay to be respectful if using real API
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"Error generating campaign for {client_name}: {e}")
+    print("=== GENERATING AD CAMPAIGNS ===")
+    if use_batch:
+        return generator.generate_campaigns_batch(clients, max_concurrency=max_workers,
+                                                  semantic_threshold=semantic_threshold)
     
-    return campaigns
+    # Clients are independent API calls, so they run concurrently; the cap keeps within rate limits
+    return generator.generate_campaigns(clients, max_concurrency=max_workers,
+                                        semantic_threshold=semantic_threshold)
 
 if __name__ == "__main__":
     # Generate complete campaigns
@@ -339,8 +1061,8 @@ if __name__ == "__main__":
     
     # Save campaigns
     os.makedirs("generated_ads_text", exist_ok=True)
-    with open('generated_ads_text/generated_ad_campaigns.json', 'w', encoding='utf-8') as f:
-        json.dump(campaigns, f, indent=2, ensure_ascii=False)
+    with open('generated_ads_text/generated_ad_campaigns.json', 'wb') as f:
+        f.write(orjson.dumps(campaigns, option=orjson.OPT_INDENT_2))
     
     print(f"\n✅ Generated {len(campaigns)} ad campaigns")
     print("📁 Campaigns saved to generated_ads_text/generated_ad_campaigns.json")
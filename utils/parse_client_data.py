@@ -1,6 +1,119 @@
-import pandas as pd
-import json
-from typing import Dict, List, Any
+import openpyxl
+import orjson
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+try:
+    # Rust XLSX reader, several times faster than openpyxl's pure-Python XML parsing
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# First-column values (lowercased) that are not article titles
+SKIP_TITLES = frozenset({'title', 'total', 'nan'})
+
+def _parse_sheet_rows(rows: Iterable[Tuple[Any, ...]]) -> Tuple[Optional[str], List[Dict[str, str]]]:
+    """
+    Parse one sheet's rows into the client URL and its news articles
+    
+    Args:
+        rows: Cell values row by row (as yielded by iter_rows(values_only=True))
+        
+    Returns:
+        Tuple of (url, news_articles)
+    """
+    url = None
+    news_articles = []
+    
+    # The sheet's first row is the column header, even when blank (as with pandas.read_excel);
+    # in the client workbook it is blank and the URL row follows it
+    for row in islice(rows, 1, None):
+        first = row[0] if row else None
+        if first is None:
+            continue
+        first_text = str(first)
+        
+        # Look for URL in first column
+        if first_text.startswith('URL -'):
+            url = first_text.replace('URL -', '').strip()
+            continue
+        
+        # Skip repeated header rows (Title, Source, Published date, URL), totals and blank titles
+        title = first_text.strip()
+        if not title or title.lower() in SKIP_TITLES:
+            continue
+        
+        # Pad short rows so the four article columns can always be indexed
+        row = tuple(row) + (None,) * (4 - len(row))
+        news_articles.append({
+            "title": title,
+            "source": str(row[1]).strip() if row[1] is not None else "",
+            "published_date": str(row[2]).strip() if row[2] is not None else "",
+            "url": str(row[3]).strip() if row[3] is not None else ""
+        })
+    
+    return url, news_articles
+
+# Below this many sheets, process start-up costs more than parsing sequentially
+PARALLEL_MIN_SHEETS = 4
+
+def _parse_one_sheet(args: Tuple[str, str]) -> Tuple[Optional[str], List[Dict[str, str]]]:
+    """Parse a single sheet in a worker process, using its own read-only workbook handle"""
+    file_path, sheet_name = args
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return _parse_sheet_rows(workbook[sheet_name].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+def _calamine_cell(cell: Any) -> Any:
+    """
+    Convert a calamine cell value to what openpyxl yields for the same cell, so both
+    readers produce the same strings: '' is an empty cell, a date cell is a midnight
+    datetime and a whole number is an int
+    """
+    if cell == '':
+        return None
+    # Excel writes whole numbers below 15 digits without a decimal point or exponent,
+    # which openpyxl reads as int
+    if isinstance(cell, float) and cell.is_integer() and abs(cell) < 1e15:
+        return int(cell)
+    if isinstance(cell, date) and not isinstance(cell, datetime):
+        return datetime.combine(cell, time())
+    return cell
+
+def _read_sheets_calamine(file_path: str) -> Tuple[List[str], List[Tuple[Optional[str], List[Dict[str, str]]]]]:
+    """Parse every sheet with calamine; fast enough that no worker processes are needed"""
+    workbook = CalamineWorkbook.from_path(file_path)
+    sheet_names = workbook.sheet_names
+    results = []
+    for name in sheet_names:
+        rows = workbook.get_sheet_by_name(name).to_python(skip_empty_area=False)
+        results.append(_parse_sheet_rows(tuple(_calamine_cell(cell) for cell in row) for row in rows))
+    return sheet_names, results
+
+def _read_sheets_openpyxl(file_path: str) -> Tuple[List[str], List[Tuple[Optional[str], List[Dict[str, str]]]]]:
+    """Parse every sheet with openpyxl, spreading large workbooks across processes"""
+    # Stream the workbook row by row; the parsing is row-wise logic, so no DataFrame is needed
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    
+    try:
+        sheet_names = workbook.sheetnames
+        if len(sheet_names) >= PARALLEL_MIN_SHEETS:
+            # Sheets (one per client) are independent and parsing holds the GIL,
+            # so spread them across processes
+            workbook.close()
+            with ProcessPoolExecutor(max_workers=min(len(sheet_names), os.cpu_count() or 1)) as executor:
+                results = list(executor.map(_parse_one_sheet, [(file_path, name) for name in sheet_names]))
+        else:
+            results = [_parse_sheet_rows(workbook[name].iter_rows(values_only=True)) for name in sheet_names]
+    finally:
+        # Read-only workbooks keep the file handle open until closed
+        workbook.close()
+    return sheet_names, results
 
 def parse_client_data(file_path: str) -> List[Dict[str, Any]]:
     """
@@ -12,48 +125,16 @@ def parse_client_data(file_path: str) -> List[Dict[str, Any]]:
     Returns:
         List of client data dictionaries
     """
-    # Read all sheets from Excel file
-    excel_data = pd.read_excel(file_path, sheet_name=None)
+    if CalamineWorkbook is not None:
+        sheet_names, results = _read_sheets_calamine(file_path)
+    else:
+        sheet_names, results = _read_sheets_openpyxl(file_path)
     
     client_data = []
     
-    for sheet_name, df in excel_data.items():
+    for sheet_name, (url, news_articles) in zip(sheet_names, results):
         print(f"Processing sheet: {sheet_name}")
         
-        # Find the URL row
-        url = None
-        news_articles = []
-        
-        for idx, row in df.iterrows():
-            # Look for URL in first column
-            if pd.notna(row.iloc[0]) and str(row.iloc[0]).startswith('URL -'):
-                url = str(row.iloc[0]).replace('URL -', '').strip()
-                continue
-            
-            # Look for news article headers (Title, Source, Published date, URL)
-            if (pd.notna(row.iloc[0]) and 
-                str(row.iloc[0]).strip().lower() == 'title' and
-                len([x for x in row if pd.notna(x)]) >= 3):
-                continue  # Skip header row
-            
-            # Parse news articles
-            if (pd.notna(row.iloc[0]) and 
-                str(row.iloc[0]).strip() and 
-                str(row.iloc[0]).strip().lower() not in ['title', 'total', 'nan']):
-                
-                title = str(row.iloc[0]).strip()
-                source = str(row.iloc[1]).strip() if pd.notna(row.iloc[1]) else ""
-                pub_date = str(row.iloc[2]).strip() if pd.notna(row.iloc[2]) else ""
-                article_url = str(row.iloc[3]).strip() if pd.notna(row.iloc[3]) else ""
-                
-                if title and title != 'nan':
-                    news_articles.append({
-                        "title": title,
-                        "source": source,
-                        "published_date": pub_date,
-                        "url": article_url
-                    })
-        
         if url and news_articles:
             client_data.append({
                 "client_name": sheet_name,
@@ -66,8 +147,8 @@ def parse_client_data(file_path: str) -> List[Dict[str, Any]]:
 
 if __name__ == '__main__':
     parsed_data = parse_client_data('URL_and_news_articles_examples_by_client.xlsx')
-    with open('parsed_client_data.json', 'w') as f:
-        json.dump(parsed_data, f, indent=4)
+    with open('parsed_client_data.json', 'wb') as f:
+        f.write(orjson.dumps(parsed_data, option=orjson.OPT_INDENT_2))
     print("Parsed data saved to parsed_client_data.json")
     
     # Print summary
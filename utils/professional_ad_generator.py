@@ -2,8 +2,11 @@
 Professional Ad Generator with Text Overlay
 Generates complete ad campaigns with images and text overlays
 """
-import json
+import orjson
 import os
+import hashlib
+import shutil
+import tempfile
 from openai import OpenAI
 import requests
 from datetime import datetime
@@ -11,6 +14,8 @@ import time
 from PIL import Image, ImageDraw, ImageFont
 import textwrap
 from pathlib import Path
+from typing import Optional
+from campaign_store import append_campaigns
 
 # Load environment variables
 try:
@@ -24,6 +29,8 @@ class ProfessionalAdGenerator:
     # Model Configuration - Using the best available OpenAI models
     IMAGE_MODEL = "dall-e-3"  # Latest DALL-E 3 model
     IMAGE_QUALITY = "hd"      # HD quality for professional marketing materials
+    IMAGE_CACHE_DIR = "image_cache"
+    WEB_IMAGE_QUALITY = 80    # Lossy WebP copy used for previews and web-optimized downloads
     
     def __init__(self, api_key: str = None):
         """Initialize the professional ad generator"""
@@ -46,7 +53,8 @@ class ProfessionalAdGenerator:
             'data': Path('data'),
             'text': Path('generated_ads_text'),
             'images': Path('generated_ads_images'),
-            'final': Path('generated_ads_images/final_ads')
+            'final': Path('generated_ads_images/final_ads'),
+            'cache': Path(self.IMAGE_CACHE_DIR)
         }
         
         for dir_path in self.dirs.values():
@@ -63,7 +71,8 @@ class ProfessionalAdGenerator:
             'client_data_with_content.json', 
             'processed_client_data_rag.json',
             'vector_index.faiss',
-            'vector_metadata.pkl'
+            'vector_metadata.pkl',
+            'vector_metadata.parquet'
         ]
         
         for file in data_files:
@@ -140,6 +149,54 @@ class ProfessionalAdGenerator:
             print(f"❌ Error downloading image: {e}")
             return False
     
+    def _image_cache_path(self, prompt: str, size: str) -> Path:
+        """
+        Path of the cached background image for a prompt, size and quality
+        The prompt names the client, so cached images are never shared across clients
+        """
+        key = hashlib.sha256(f"{self.IMAGE_MODEL}|{prompt}|{size}|{self.IMAGE_QUALITY}".encode('utf-8')).hexdigest()
+        return self.dirs['cache'] / f"{key}.png"
+    
+    def get_background_image(self, prompt: str, size: str, filename: str, use_cache: bool = True) -> bool:
+        """
+        Save a background image for the prompt to filename, generating it only on a cache miss
+        
+        Args:
+            prompt: Image prompt
+            size: DALL-E image size
+            filename: Where to save the image
+            use_cache: Reuse a previously generated image for the same prompt, size and quality
+            
+        Returns:
+            True if the image was saved
+        """
+        cache_path = self._image_cache_path(prompt, size)
+        if not (use_cache and cache_path.exists()):
+            image_url = self.generate_background_image(prompt, size)
+            if not image_url:
+                return False
+            # Download to a temporary name of its own, so a failed download never looks like a
+            # cache hit and concurrent jobs for the same prompt never share a partial file
+            with tempfile.NamedTemporaryFile(dir=cache_path.parent, prefix=f"{cache_path.stem}.",
+                                             suffix=".part", delete=False) as partial_file:
+                partial_path = partial_file.name
+            if not self.download_image(image_url, partial_path):
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                return False
+            try:
+                os.replace(partial_path, cache_path)
+            except OSError:
+                # Lost a race with another job caching the same image; use its copy
+                os.remove(partial_path)
+                if not cache_path.exists():
+                    return False
+        else:
+            print(f"♻️  Reusing cached background image for prompt: {prompt[:60]}...")
+        
+        shutil.copyfile(cache_path, filename)
+        return True
+    
     def add_text_overlay(self, background_path: str, ad_data: dict, client_name: str, 
                         ad_format: str, output_path: str) -> bool:
         """Add professional text overlay to background image"""
@@ -262,6 +319,97 @@ class ProfessionalAdGenerator:
             print(f"❌ Error adding text overlay: {e}")
             return False
     
+    @staticmethod
+    def web_image_path(image_path: str) -> str:
+        """Path of the WebP copy of a final ad"""
+        return str(Path(image_path).with_suffix('')) + '_web.webp'
+    
+    def create_web_image(self, image_path: str) -> Optional[str]:
+        """
+        Save a lossy WebP copy of a final ad next to it
+        The HD PNGs are several MB each; the WebP copy is a fraction of that size
+        and is what galleries and web-optimized downloads serve
+        
+        Args:
+            image_path: Final ad PNG
+            
+        Returns:
+            Path of the WebP copy, or None if it could not be written
+        """
+        web_path = self.web_image_path(image_path)
+        try:
+            with Image.open(image_path) as img:
+                img.save(web_path, 'WEBP', quality=self.WEB_IMAGE_QUALITY)
+            return web_path
+        except Exception as e:
+            print(f"⚠️ Could not create WebP copy of {image_path}: {e}")
+            return None
+    
+    def generate_complete_ad_campaign_for_client(self, client_name: str, ad_data: dict, ad_format: str,
+                                                  size: str = None, use_cache: bool = True) -> dict:
+        """
+        Generate one complete ad (background image plus text overlay) for a client and format
+        
+        Safe to call from several threads at once: each call writes its own files
+        
+        Args:
+            client_name: Client name
+            ad_data: Ad creative for this format (headline, body, call_to_action, image_description)
+            ad_format: Ad format key, e.g. 'linkedin_single_image'
+            size: DALL-E image size (defaults by format)
+            use_cache: Reuse a previously generated background image for the same prompt
+            
+        Returns:
+            Metadata of the generated ad, or None if it failed
+        """
+        image_description = ad_data.get('image_description', '')
+        if not image_description:
+            return None
+        
+        # Enhanced prompt for background image (no text)
+        enhanced_prompt = self.enhance_image_prompt(
+            image_description, client_name, ad_format
+        )
+        
+        # Determine size based on format
+        if size is None:
+            if "banner" in ad_format.lower():
+                size = "1792x1024"  # Wide banner
+            elif "linkedin" in ad_format.lower():
+                size = "1024x1024"  # Square
+            else:
+                size = "1024x1024"
+        
+        # Create filenames
+        safe_client = client_name.replace(' ', '_').replace('.', '')
+        safe_format = ad_format.replace(' ', '_')
+        timestamp = datetime.now().strftime("%H%M%S")
+        
+        # Background image
+        bg_filename = self.dirs['images'] / f"{safe_client}_{safe_format}_bg_{timestamp}.png"
+        
+        # Final ad with text
+        final_filename = self.dirs['final'] / f"{safe_client}_{safe_format}_final_{timestamp}.png"
+        
+        # Generate (or reuse) background, then add text overlay
+        if not self.get_background_image(enhanced_prompt, size, str(bg_filename), use_cache=use_cache):
+            return None
+        if not self.add_text_overlay(str(bg_filename), ad_data, client_name, ad_format, str(final_filename)):
+            return None
+        
+        return {
+            'client': client_name,
+            'ad_format': ad_format,
+            'background_image': str(bg_filename),
+            'final_ad': str(final_filename),
+            'web_image': self.create_web_image(str(final_filename)),
+            'headline': ad_data.get('headline', ''),
+            'body': ad_data.get('body', ''),
+            'cta': ad_data.get('call_to_action', ''),
+            'size': size,
+            'generated_at': datetime.now().isoformat()
+        }
+    
     def generate_complete_ad_campaign(self, campaigns_file: str = 'generated_ad_campaigns.json'):
         """Generate complete ad campaign with images and text"""
         
@@ -270,17 +418,15 @@ class ProfessionalAdGenerator:
         
         # Load campaigns
         try:
-            with open(campaigns_file, 'r') as f:
-                campaigns = json.load(f)
+            with open(campaigns_file, 'rb') as f:
+                campaigns = orjson.loads(f.read())
         except FileNotFoundError:
             print(f"❌ Campaign file not found: {campaigns_file}")
             return
         
-        # Save text campaigns to organized folder
-        text_output = self.dirs['text'] / 'ad_campaigns.json'
-        with open(text_output, 'w') as f:
-            json.dump(campaigns, f, indent=2)
-        print(f"📝 Text campaigns saved: {text_output}")
+        # Add text campaigns to the campaign log in the organized folder
+        append_campaigns(campaigns, str(self.dirs['text'] / 'ad_campaigns.jsonl'))
+        print(f"📝 Text campaigns saved: {self.dirs['text'] / 'ad_campaigns.jsonl'}")
         
         generated_ads = []
         
@@ -295,58 +441,14 @@ class ProfessionalAdGenerator:
                 if not isinstance(ad_data, dict):
                     continue
                 
-                image_description = ad_data.get('image_description', '')
-                if not image_description:
+                if not ad_data.get('image_description'):
                     continue
                 
                 print(f"\n📢 Processing {ad_format}")
                 
-                # Enhanced prompt for background image (no text)
-                enhanced_prompt = self.enhance_image_prompt(
-                    image_description, client_name, ad_format
-                )
-                
-                # Determine size based on format
-                if "banner" in ad_format.lower():
-                    size = "1792x1024"  # Wide banner
-                elif "linkedin" in ad_format.lower():
-                    size = "1024x1024"  # Square
-                else:
-                    size = "1024x1024"
-                
-                # Generate background image
-                image_url = self.generate_background_image(enhanced_prompt, size)
-                
-                if image_url:
-                    # Create filenames
-                    safe_client = client_name.replace(' ', '_').replace('.', '')
-                    safe_format = ad_format.replace(' ', '_')
-                    timestamp = datetime.now().strftime("%H%M%S")
-                    
-                    # Background image
-                    bg_filename = self.dirs['images'] / f"{safe_client}_{safe_format}_bg_{timestamp}.png"
-                    
-                    # Final ad with text
-                    final_filename = self.dirs['final'] / f"{safe_client}_{safe_format}_final_{timestamp}.png"
-                    
-                    # Download background
-                    if self.download_image(image_url, str(bg_filename)):
-                        
-                        # Add text overlay
-                        if self.add_text_overlay(str(bg_filename), ad_data, client_name, 
-                                               ad_format, str(final_filename)):
-                            
-                            generated_ads.append({
-                                'client': client_name,
-                                'ad_format': ad_format,
-                                'background_image': str(bg_filename),
-                                'final_ad': str(final_filename),
-                                'headline': ad_data.get('headline', ''),
-                                'body': ad_data.get('body', ''),
-                                'cta': ad_data.get('call_to_action', ''),
-                                'size': size,
-                                'generated_at': datetime.now().isoformat()
-                            })
+                ad = self.generate_complete_ad_campaign_for_client(client_name, ad_data, ad_format)
+                if ad:
+                    generated_ads.append(ad)
                 
                 # Rate limiting for API calls
                 print("⏳ Waiting 3 seconds for next generation...")
@@ -354,8 +456,8 @@ class ProfessionalAdGenerator:
         
         # Save metadata
         metadata_file = self.dirs['final'] / 'ad_metadata.json'
-        with open(metadata_file, 'w') as f:
-            json.dump(generated_ads, f, indent=2)
+        with open(metadata_file, 'wb') as f:
+            f.write(orjson.dumps(generated_ads, option=orjson.OPT_INDENT_2))
         
         print(f"\n🎉 CAMPAIGN GENERATION COMPLETE!")
         print(f"✅ Generated {len(generated_ads)} complete ads")
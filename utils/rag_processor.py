@@ -2,19 +2,43 @@
 RAG-Enabled NLP Processor for Alphix ML Challenge
 Implements vector database and semantic search for news-responsive ad generation
 """
-import json
+import io
+import orjson
+import zstandard
+from itertools import islice
+from functools import lru_cache
+try:
+    # RE2 matches with a linear-time automaton instead of backtracking
+    import re2 as re
+except ImportError:
+    import re
+import re as unicode_re
 import numpy as np
-from typing import List, Dict, Any, Tuple
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Any, Optional, Tuple, BinaryIO, TYPE_CHECKING
 from rake_nltk import Rake
 import faiss
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pickle
+import mmap
 import os
+import hashlib
 import nltk
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 # Download required NLTK data
 def download_nltk_data():
     """Download required NLTK data for RAKE keyword extraction"""
+    # Nothing to do when the data is already installed (a local lookup, no network)
+    try:
+        nltk.data.find('corpora/stopwords')
+        nltk.data.find('tokenizers/punkt')
+        return
+    except LookupError:
+        pass
+    
     try:
         # Try to download to a local directory first (for Streamlit Cloud)
         download_dir = os.path.join(os.getcwd(), 'nltk_data')
@@ -37,19 +61,118 @@ def download_nltk_data():
 # Download NLTK data on import
 download_nltk_data()
 
+# Columnar (struct-of-arrays) layout of the vector database metadata
+METADATA_COLUMNS = ['type', 'client_name', 'url', 'chunk_id', 'title', 'source',
+                    'published_date', 'content', 'keywords']
+METADATA_PATH = "data/vector_metadata.parquet"
+LEGACY_METADATA_PATH = "data/vector_metadata.pkl"
+
+# Word tokenizer for RAKE: a single precompiled regex instead of NLTK's word_tokenize.
+# Punctuation is kept as one-character tokens so RAKE still splits phrases on it.
+# Compiled with stdlib re, whose \w is Unicode-aware (RE2's is ASCII-only), so
+# accented words such as "Société" stay whole whichever engine is installed
+RAKE_TOKEN_PATTERN = unicode_re.compile(r"[^\W_][\w'-]*|[^\w\s]")
+
+def tokenize_words(sentence: str) -> List[str]:
+    """Split a sentence into words and punctuation for RAKE"""
+    return RAKE_TOKEN_PATTERN.findall(sentence)
+
+# NLTK resources for RAKE, loaded once per process and shared by every Rake instance
+# (Rake() otherwise rereads the stopwords corpus, and some NLTK versions rebuild
+# the Punkt tokenizer on every sent_tokenize call)
+@lru_cache(maxsize=None)
+def get_stopwords(language: str = 'english') -> frozenset:
+    """NLTK stopwords for a language"""
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words(language))
+
+@lru_cache(maxsize=None)
+def get_sentence_tokenizer(language: str = 'english'):
+    """Punkt sentence tokenizer function for a language"""
+    try:
+        from nltk.tokenize import PunktTokenizer  # NLTK >= 3.8.2
+        return PunktTokenizer(language).tokenize
+    except ImportError:
+        return nltk.data.load(f'tokenizers/punkt/{language}.pickle').tokenize
+
+def create_rake() -> Rake:
+    """RAKE keyword extractor built on the shared NLTK resources"""
+    return Rake(stopwords=get_stopwords(), sentence_tokenizer=get_sentence_tokenizer(),
+                word_tokenizer=tokenize_words)
+
+# Fallback keyword extraction: the first words of 4+ characters in document order that
+# are not stop words; frozenset lookups, and the scan stops once enough are found
+FALLBACK_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+    'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those', 'i',
+    'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'
+})
+# Shorter list used when RAKE itself raised
+RAKE_ERROR_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'
+})
+
+@lru_cache(maxsize=None)
+def configure_torch_threads() -> None:
+    """
+    Size PyTorch's thread pools, once per process (the settings are process-wide)
+    Encoding is CPU-bound: PyTorch gets half the cores for intra-op parallelism
+    (leaving room for Streamlit and tokenization) and few inter-op threads
+    """
+    # Imported here: torch takes seconds to load
+    import torch
+    torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+    try:
+        torch.set_num_interop_threads(2)
+    except RuntimeError:
+        # Can only be set before any inter-op parallel work has started
+        pass
+
+class ParquetMetadata:
+    """
+    Read-only, list-like view over the Parquet metadata file
+    The file is memory-mapped, and a full row is only materialized when it is accessed
+    """
+    def __init__(self, path: str):
+        self.table = pq.read_table(path, memory_map=True)
+    
+    def __len__(self) -> int:
+        return self.table.num_rows
+    
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        row = self.table.slice(int(idx), 1).to_pylist()[0]
+        # Drop columns that do not apply to this record type (e.g. title for landing pages)
+        return {key: value for key, value in row.items() if value is not None}
+
 class RAGProcessor:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    # Index selection by corpus size: exhaustive float16 search for small corpora,
+    # HNSW graph search for medium ones and IVF-PQ compression for large ones
+    HNSW_MIN_VECTORS = 10_000
+    IVFPQ_MIN_VECTORS = 100_000
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_EF_SEARCH = 64
+    IVF_NPROBE = 16
+    
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", model: "SentenceTransformer" = None):
         """
         Initialize RAG processor with embedding model and vector database
         
         Args:
             model_name: SentenceTransformer model name
+            model: Optional preloaded SentenceTransformer to reuse instead of loading model_name
         """
-        self.model = SentenceTransformer(model_name)
+        # Imported here: sentence-transformers takes seconds to load, so importing
+        # this module stays cheap until a processor is actually created
+        from sentence_transformers import SentenceTransformer
+        
+        configure_torch_threads()
+        self.model = model if model is not None else SentenceTransformer(model_name)
         
         # Initialize RAKE with error handling
         try:
-            self.rake = Rake()
+            self.rake = create_rake()
             print("✅ RAKE keyword extractor initialized successfully")
         except Exception as e:
             print(f"⚠️ Warning: Could not initialize RAKE: {e}")
@@ -58,6 +181,7 @@ class RAGProcessor:
         
         self.dimension = 384  # Dimension for all-MiniLM-L6-v2
         self.index = None
+        self.embeddings = None
         self.news_database = []
         self.client_database = []
         
@@ -65,38 +189,71 @@ class RAGProcessor:
         """Get embedding for text"""
         return self.model.encode(text)
     
+    def encode_batch(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Encode many texts in batched forward passes
+        
+        Args:
+            texts: Texts to embed
+            batch_size: Number of texts per forward pass
+            
+        Returns:
+            L2-normalized float32 array of shape (len(texts), dimension)
+        """
+        # Encode each distinct text once; repeated headlines and boilerplate reuse its vector
+        positions = {}
+        unique_texts = []
+        row_for_text = []
+        for text in texts:
+            text_hash = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+            if text_hash not in positions:
+                positions[text_hash] = len(unique_texts)
+                unique_texts.append(text)
+            row_for_text.append(positions[text_hash])
+        
+        unique_embeddings = self.model.encode(
+            unique_texts,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype('float32')
+        
+        if len(unique_texts) < len(texts):
+            print(f"Encoded {len(unique_texts)} unique texts out of {len(texts)}")
+        return unique_embeddings[row_for_text]
+    
     def extract_keywords(self, text: str, max_keywords: int = 5) -> List[str]:
         """Extract keywords using RAKE"""
         if self.rake is None:
-            # Fallback: simple keyword extraction
-            words = text.lower().split()
-            # Remove common words and short words
-            stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'}
-            keywords = [word for word in words if len(word) > 3 and word not in stop_words]
-            return keywords[:max_keywords]
+            return self._extract_keywords_fallback(text, max_keywords)
         
         try:
             self.rake.extract_keywords_from_text(text)
             return self.rake.get_ranked_phrases()[:max_keywords]
         except Exception as e:
             print(f"⚠️ RAKE keyword extraction failed: {e}")
-            # Fallback to simple extraction
-            words = text.lower().split()
-            stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-            keywords = [word for word in words if len(word) > 3 and word not in stop_words]
-            return keywords[:max_keywords]
+            return self._extract_keywords_fallback(text, max_keywords, RAKE_ERROR_STOP_WORDS)
     
-    def build_vector_database(self, client_data: List[Dict[str, Any]]) -> None:
+    @staticmethod
+    def _extract_keywords_fallback(text: str, max_keywords: int = 5,
+                                   stop_words: frozenset = FALLBACK_STOP_WORDS) -> List[str]:
+        """Simple keyword extraction: the first whitespace-separated words longer than 3 characters that are not stop words"""
+        words = (word for word in text.lower().split() if len(word) > 3 and word not in stop_words)
+        return list(islice(words, max_keywords))
+    
+    def build_vector_database(self, client_data: List[Dict[str, Any]], batch_size: int = 64) -> None:
         """
         Build FAISS vector database from client and news data
         
         Args:
             client_data: List of client data with landing page content and news articles
+            batch_size: Number of texts per forward pass when embedding
         """
         print("Building vector database...")
         
-        # Prepare embeddings for all content
-        embeddings = []
+        # Collect texts and their metadata in parallel lists, then embed them in one batched pass
+        texts = []
         metadata = []
         
         # Process client landing pages
@@ -106,8 +263,7 @@ class RAGProcessor:
                 chunks = self._chunk_text(client['landing_page_content'], max_length=512)
                 
                 for i, chunk in enumerate(chunks):
-                    embedding = self.get_embedding(chunk)
-                    embeddings.append(embedding)
+                    texts.append(chunk)
                     metadata.append({
                         'type': 'landing_page',
                         'client_name': client['client_name'],
@@ -122,8 +278,7 @@ class RAGProcessor:
             for article in client['news_articles']:
                 # Combine title and source for richer embedding
                 article_text = f"{article['title']} {article.get('source', '')}"
-                embedding = self.get_embedding(article_text)
-                embeddings.append(embedding)
+                texts.append(article_text)
                 metadata.append({
                     'type': 'news_article',
                     'client_name': client['client_name'],
@@ -135,22 +290,62 @@ class RAGProcessor:
                     'keywords': self.extract_keywords(article_text)
                 })
         
-        # Build FAISS index
-        embeddings_array = np.array(embeddings).astype('float32')
-        self.index = faiss.IndexFlatIP(self.dimension)  # Inner product for cosine similarity
+        embeddings_array = self.encode_batch(texts, batch_size=batch_size)
         
         # Normalize embeddings for cosine similarity
         faiss.normalize_L2(embeddings_array)
+        
+        # Build FAISS index
+        self.index = self._create_index(embeddings_array)
         self.index.add(embeddings_array)
+        # Keep the exact vectors for in-memory batch ranking (see rank_news_for_clients)
+        self.embeddings = embeddings_array
         
         # Store metadata
         self.metadata = metadata
         
-        print(f"Vector database built with {len(embeddings)} embeddings")
+        print(f"Vector database built with {len(embeddings_array)} embeddings")
         
         # Save index and metadata
         self._save_index()
     
+    def _create_index(self, embeddings: np.ndarray) -> faiss.Index:
+        """
+        Create an inner-product FAISS index suited to the corpus size
+        
+        Args:
+            embeddings: Normalized embeddings the index will hold (used for training)
+            
+        Returns:
+            Empty (but trained, if required) FAISS index
+        """
+        num_vectors = len(embeddings)
+        
+        if num_vectors >= self.IVFPQ_MIN_VECTORS:
+            # Product quantization: dimension/4 sub-vectors of 8 bits each
+            nlist = int(np.sqrt(num_vectors))
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            index = faiss.IndexIVFPQ(quantizer, self.dimension, nlist, self.dimension // 4, 8,
+                                     faiss.METRIC_INNER_PRODUCT)
+            index.train(embeddings)
+            index.nprobe = self.IVF_NPROBE
+            return index
+        
+        # Vectors are stored as float16, halving memory with negligible effect on ranking
+        if num_vectors >= self.HNSW_MIN_VECTORS:
+            index = faiss.IndexHNSWSQ(self.dimension, faiss.ScalarQuantizer.QT_fp16, self.HNSW_M,
+                                      faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = self.HNSW_EF_SEARCH
+        else:
+            # Inner product for cosine similarity
+            index = faiss.IndexScalarQuantizer(self.dimension, faiss.ScalarQuantizer.QT_fp16,
+                                               faiss.METRIC_INNER_PRODUCT)
+        
+        if not index.is_trained:
+            index.train(embeddings)
+        return index
+    
     def _chunk_text(self, text: str, max_length: int = 512) -> List[str]:
         """Chunk text into smaller pieces for better retrieval"""
         words = text.split()
@@ -216,6 +411,43 @@ class RAGProcessor:
         
         return results
     
+    def semantic_search_batch(self, queries: List[str], k: int = 5, filter_type: str = None,
+                              batch_size: int = 64) -> List[List[Dict[str, Any]]]:
+        """
+        Semantic search for many queries with one batched encode and one FAISS search
+        
+        Args:
+            queries: Search queries
+            k: Number of results per query
+            filter_type: Optional filter by content type ('landing_page' or 'news_article')
+            batch_size: Number of queries per forward pass
+            
+        Returns:
+            Search results per query, as returned by semantic_search
+        """
+        if self.index is None:
+            raise ValueError("Vector database not built yet. Call build_vector_database() first.")
+        if not queries:
+            return []
+        
+        query_embeddings = self.encode_batch(queries, batch_size=batch_size)
+        scores, indices = self.index.search(query_embeddings, k * 2)  # Get more results for filtering
+        
+        all_results = []
+        for query_scores, query_indices in zip(scores, indices):
+            results = []
+            for score, idx in zip(query_scores, query_indices):
+                if idx == -1:  # Invalid index
+                    continue
+                metadata = self.metadata[idx]
+                if filter_type and metadata['type'] != filter_type:
+                    continue
+                results.append({**metadata, 'similarity_score': float(score)})
+                if len(results) >= k:
+                    break
+            all_results.append(results)
+        return all_results
+    
     def find_relevant_news(self, client_name: str, landing_page_content: str, k: int = 10) -> List[Dict[str, Any]]:
         """
         Find relevant news articles for a specific client's landing page
@@ -237,6 +469,71 @@ class RAGProcessor:
         
         return results
     
+    def _news_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the row ids and vectors of all news articles in the database
+        
+        Returns:
+            Tuple of (row ids, float32 vectors); vectors is None if the index cannot reconstruct them
+        """
+        if isinstance(self.metadata, ParquetMetadata):
+            types = self.metadata.table.column('type').to_numpy(zero_copy_only=False)
+        else:
+            types = np.array([record['type'] for record in self.metadata])
+        rows = np.flatnonzero(types == 'news_article')
+        
+        if self.embeddings is not None:
+            return rows, self.embeddings[rows]
+        try:
+            # Flat and HNSW scalar-quantized indexes can decode their stored vectors
+            return rows, self.index.reconstruct_n(0, self.index.ntotal)[rows]
+        except RuntimeError:
+            # IVF indexes need a direct map to reconstruct, which is not kept on disk
+            return rows, None
+    
+    def rank_news_for_clients(self, landing_pages: List[str], k: int = 10,
+                              batch_size: int = 64) -> List[Tuple[List[str], List[Dict[str, Any]]]]:
+        """
+        Find relevant news for many landing pages in one pass
+        
+        All queries are encoded in one batch and scored against every news vector with a
+        single matrix product, instead of one encode + FAISS search per client.
+        
+        Args:
+            landing_pages: Landing page content per client
+            k: Number of relevant news articles per client
+            batch_size: Number of queries per forward pass
+            
+        Returns:
+            List of (landing page keywords, relevant news with similarity scores), one per landing page
+        """
+        # Same query construction as find_relevant_news
+        keywords = [self.extract_keywords(content, max_keywords=10) for content in landing_pages]
+        queries = [f"{content[:500]} {' '.join(words)}" for content, words in zip(landing_pages, keywords)]
+        
+        rows, news_vectors = self._news_vectors()
+        if news_vectors is None:
+            return [(words[:5], self.semantic_search(query, k=k, filter_type='news_article'))
+                    for words, query in zip(keywords, queries)]
+        
+        query_vectors = self.encode_batch(queries, batch_size=batch_size)
+        scores = query_vectors @ news_vectors.T
+        
+        top_k = min(k, scores.shape[1])
+        results = []
+        for words, client_scores in zip(keywords, scores):
+            if top_k == 0:
+                results.append((words[:5], []))
+                continue
+            # Partial selection of the top k, then sort only those
+            top = np.argpartition(-client_scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-client_scores[top])]
+            results.append((words[:5], [
+                {**self.metadata[rows[i]], 'similarity_score': float(client_scores[i])}
+                for i in top
+            ]))
+        return results
+    
     def get_contextual_information(self, client_name: str, topic: str, k: int = 5) -> Dict[str, Any]:
         """
         Get contextual information for ad generation
@@ -276,57 +573,126 @@ class RAGProcessor:
         os.makedirs("data", exist_ok=True)
         
         faiss.write_index(self.index, "data/vector_index.faiss")
-        with open("data/vector_metadata.pkl", "wb") as f:
-            pickle.dump(self.metadata, f)
+        
+        # Store metadata column-wise; fields a record does not have are null
+        columns = {name: [record.get(name) for record in self.metadata] for name in METADATA_COLUMNS}
+        pq.write_table(pa.Table.from_pydict(columns), METADATA_PATH, compression='zstd')
         print("Vector database saved to data/ directory")
     
     def load_index(self):
         """Load FAISS index and metadata from disk"""
-        if os.path.exists("data/vector_index.faiss") and os.path.exists("data/vector_metadata.pkl"):
-            self.index = faiss.read_index("data/vector_index.faiss")
-            with open("data/vector_metadata.pkl", "rb") as f:
-                self.metadata = pickle.load(f)
-            print("Vector database loaded from data/ directory")
-            return True
-        return False
+        if not os.path.exists("data/vector_index.faiss"):
+            return False
+        
+        if os.path.exists(METADATA_PATH):
+            metadata = ParquetMetadata(METADATA_PATH)
+        elif os.path.exists(LEGACY_METADATA_PATH):
+            # Databases built before the Parquet format stored pickled metadata
+            with open(LEGACY_METADATA_PATH, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    metadata = pickle.loads(mm)
+        else:
+            return False
+        
+        # Memory-map the index instead of deserializing it; pages are shared through the OS cache
+        self.index = faiss.read_index("data/vector_index.faiss", faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        # nprobe is a search-time parameter and is not stored in the index file
+        if isinstance(self.index, faiss.IndexIVF):
+            self.index.nprobe = self.IVF_NPROBE
+        self.metadata = metadata
+        print("Vector database loaded from data/ directory")
+        return True
+
+def load_client_data(client_data_file: str) -> List[Dict[str, Any]]:
+    """
+    Load client data from a JSON array or a JSON Lines file (one client per line)
+    
+    Args:
+        client_data_file: Path to a .json, .jsonl or zstd-compressed .jsonl.zst file
+        
+    Returns:
+        List of client records
+    """
+    with open(client_data_file, 'rb') as f:
+        if client_data_file.endswith('.jsonl.zst'):
+            lines = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(f), encoding='utf-8')
+            return [orjson.loads(line) for line in lines if line.strip()]
+        if client_data_file.endswith('.jsonl'):
+            return [orjson.loads(line) for line in f if line.strip()]
+        return orjson.loads(f.read())
 
-def process_client_data_with_rag(client_data_file: str = 'client_data_with_content.json') -> Dict[str, Any]:
+def stream_dump_dict(d: Dict[str, Any], f: BinaryIO, indent: bool = False) -> None:
+    """
+    Write a dict as a JSON object one top-level entry at a time
+    Only one serialized entry is held in memory, instead of the whole document
+    
+    Args:
+        d: Dict to write
+        f: File opened in binary mode
+        indent: Pretty-print with two-space indentation (same output as OPT_INDENT_2)
+    """
+    if not d:
+        f.write(b'{}')
+        return
+    
+    option = orjson.OPT_INDENT_2 if indent else None
+    separator, open_brace, close_brace = (b',\n  ', b'{\n  ', b'\n}') if indent else (b',', b'{', b'}')
+    
+    f.write(open_brace)
+    first = True
+    for key, value in d.items():
+        payload = orjson.dumps(value, option=option)
+        if indent:
+            # Nest the value one level deeper; JSON strings never contain raw newlines
+            payload = payload.replace(b'\n', b'\n  ')
+        f.write((b'' if first else separator) + orjson.dumps(key) + (b': ' if indent else b':') + payload)
+        first = False
+    f.write(close_brace)
+
+def process_client_data_with_rag(client_data_file: str = 'client_data_with_content.json',
+                                 batch_size: int = 64,
+                                 client_data: Optional[List[Dict[str, Any]]] = None,
+                                 rag_processor: Optional[RAGProcessor] = None) -> Dict[str, Any]:
     """
     Process client data and build RAG system
     
     Args:
-        client_data_file: Path to client data file
+        client_data_file: Path to client data file (.json, .jsonl or .jsonl.zst)
+        batch_size: Number of texts per forward pass when embedding
+        client_data: Client records already in memory; when given, client_data_file is not read
+        rag_processor: Already initialized processor (e.g. warmed up in the background) to use
         
     Returns:
         Processed data with RAG capabilities (serializable)
     """
     # Load client data
-    with open(client_data_file, 'r', encoding='utf-8') as f:
-        client_data = json.load(f)
+    if client_data is None:
+        client_data = load_client_data(client_data_file)
     
     # Initialize RAG processor
-    rag_processor = RAGProcessor()
+    if rag_processor is None:
+        rag_processor = RAGProcessor()
     
     # Try to load existing index
     if not rag_processor.load_index():
         # Build new vector database
-        rag_processor.build_vector_database(client_data)
+        rag_processor.build_vector_database(client_data, batch_size=batch_size)
+    
+    # Rank news for every client with content in one batched pass
+    clients = []
+    for client in client_data:
+        if client.get('landing_page_content'):
+            clients.append(client)
+        else:
+            print(f"Warning: No landing page content for {client['client_name']}")
+    rankings = rag_processor.rank_news_for_clients([client['landing_page_content'] for client in clients],
+                                                   batch_size=batch_size)
     
     # Process each client
     processed_data = {}
-    for client in client_data:
+    for client, (keywords, relevant_news) in zip(clients, rankings):
         client_name = client['client_name']
-        landing_page_content = client.get('landing_page_content', '')
-        
-        if not landing_page_content:
-            print(f"Warning: No landing page content for {client_name}")
-            continue
-        
-        # Extract keywords from landing page
-        keywords = rag_processor.extract_keywords(landing_page_content)
-        
-        # Find relevant news articles
-        relevant_news = rag_processor.find_relevant_news(client_name, landing_page_content)
+        landing_page_content = client['landing_page_content']
         
         # Create processed entry (only serializable data)
         processed_data[client_name] = {
@@ -346,8 +712,8 @@ if __name__ == "__main__":
     
     # Save processed data
     os.makedirs("data", exist_ok=True)
-    with open('data/processed_client_data_rag.json', 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    with open('data/processed_client_data_rag.json', 'wb') as f:
+        stream_dump_dict(result, f, indent=True)
     
     print(f"\nProcessed data saved to data/processed_client_data_rag.json")
     print(f"Vector database and metadata saved for future use")
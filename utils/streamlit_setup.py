@@ -3,9 +3,14 @@ Streamlit-specific setup utilities for News-Responsive Ad Generation
 Handles NLTK data download and other setup requirements for Streamlit Cloud
 """
 
+import io
 import os
+import hashlib
 import sys
+import orjson
+import zstandard
 import subprocess
+from itertools import islice
 import streamlit as st
 from pathlib import Path
 
@@ -48,6 +53,156 @@ def setup_nltk_for_streamlit():
         st.error("❌ NLTK not installed. Please install it first: pip install nltk")
         return False
 
+@st.cache_resource(show_spinner="Loading embedding model...")
+def get_sentence_transformer(model_name: str = "all-MiniLM-L6-v2"):
+    """
+    Load a SentenceTransformer model once per process
+    Streamlit reruns the page script on every interaction, so the model is
+    cached as a shared resource instead of being reloaded each time
+    """
+    from sentence_transformers import SentenceTransformer
+    from rag_processor import configure_torch_threads
+    # Thread pools are sized before the model's first forward pass
+    configure_torch_threads()
+    return SentenceTransformer(model_name)
+
+@st.cache_data(show_spinner=False)
+def load_json_cached(path: str, mtime: float):
+    """
+    Load a JSON (or JSON Lines) artifact, memoized across reruns
+    The file's mtime is part of the cache key, so a rewritten file is reloaded
+    """
+    if path.endswith(('.jsonl', '.jsonl.zst')):
+        return list(stream_jsonl(path))
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith('.zst'):
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return orjson.loads(data)
+
+def load_json(path: str):
+    """Load a JSON artifact through the mtime-keyed cache"""
+    return load_json_cached(path, os.path.getmtime(path))
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def read_png_cached(path: str, mtime: float) -> bytes:
+    """
+    Read an image file's bytes, memoized across reruns
+    The file's mtime is part of the cache key, so a regenerated image is reread
+    """
+    with open(path, 'rb') as f:
+        return f.read()
+
+def read_png(path: str) -> bytes:
+    """Read an image through the mtime-keyed cache"""
+    return read_png_cached(path, os.path.getmtime(path))
+
+def open_jsonl(path: str):
+    """Open a JSON Lines file for line iteration, decompressing .zst files on the fly"""
+    f = open(path, 'rb')
+    if path.endswith('.zst'):
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(f), encoding='utf-8')
+    return f
+
+def open_jsonl_writer(path: str):
+    """
+    Open a JSON Lines file for writing bytes, zstd-compressing (level 3) if it ends in .zst
+    Scraped landing page text compresses several-fold, so less data hits the disk
+    """
+    f = open(path, 'wb')
+    if path.endswith('.zst'):
+        return zstandard.ZstdCompressor(level=3).stream_writer(f)
+    return f
+
+def stream_jsonl(path: str, n: int = None):
+    """
+    Yield records from a JSON Lines file one line at a time
+    
+    Args:
+        path: Path to the .jsonl file (zstd-compressed if it ends in .zst)
+        n: Optional number of records to read; only the first n lines are parsed
+    """
+    with open_jsonl(path) as f:
+        lines = (line for line in f if line.strip())
+        for line in islice(lines, n):
+            yield orjson.loads(line)
+
+def get_session_data(name: str):
+    """
+    Load a pipeline artifact recorded in session state
+    Pages only store the artifact path (st.session_state.<name>_path), not the data
+    itself, so session state stays small; the data comes from the mtime-keyed cache
+    
+    Args:
+        name: Artifact name, e.g. 'parsed_data', 'client_data_with_content' or 'processed_data'
+        
+    Returns:
+        The loaded data, or None if no artifact is recorded or the file is gone
+    """
+    path = st.session_state.get(f"{name}_path")
+    if not path or not os.path.exists(path):
+        return None
+    return load_json(path)
+
+@st.cache_resource(show_spinner="Loading vector database...")
+def get_rag_processor(index_mtime: float, model_name: str = "all-MiniLM-L6-v2"):
+    """
+    Load the RAG processor and its FAISS index once per index version
+    Returns None when no index has been built yet
+    """
+    from rag_processor import RAGProcessor
+    rag_processor = RAGProcessor(model_name=model_name, model=get_sentence_transformer(model_name))
+    if not rag_processor.load_index():
+        return None
+    return rag_processor
+
+INDEX_PATH = "data/vector_index.faiss"
+
+@st.cache_resource(show_spinner="Initializing ad generator...")
+def _get_openai_generator(api_key_hash: str, use_rag: bool, index_mtime: float, _api_key: str):
+    from openai_ad_generator import OpenAIAdGenerator
+    generator = OpenAIAdGenerator(api_key=_api_key)
+    if use_rag:
+        # Share the cached vector database instead of loading a second copy
+        rag_processor = get_rag_processor(index_mtime) if index_mtime else None
+        if rag_processor is not None:
+            generator.rag_processor = rag_processor
+        else:
+            generator.load_rag_processor()
+    return generator
+
+def get_openai_generator(api_key: str, use_rag: bool):
+    """
+    Get an OpenAIAdGenerator (with RAG loaded if requested), created once per configuration
+    Cached on a hash of the API key so the key itself is not part of the cache key;
+    a rebuilt vector index (new mtime) gives a fresh generator
+    """
+    index_mtime = os.path.getmtime(INDEX_PATH) if os.path.exists(INDEX_PATH) else 0.0
+    api_key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    return _get_openai_generator(api_key_hash, use_rag, index_mtime, api_key)
+
+@st.cache_resource(show_spinner="Initializing image generator...")
+def _get_professional_generator(api_key_hash: str, _api_key: str):
+    from professional_ad_generator import ProfessionalAdGenerator
+    return ProfessionalAdGenerator(api_key=_api_key)
+
+def get_professional_generator(api_key: str = None):
+    """
+    Get a ProfessionalAdGenerator created once per API key (None loads it from the environment)
+    """
+    api_key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    return _get_professional_generator(api_key_hash, api_key)
+
+@st.cache_resource
+def get_image_work_pool(max_workers: int = 4):
+    """
+    Get the process-wide thread pool that runs DALL-E image jobs
+    Jobs outlive the script run that submitted them, so the page can return
+    immediately and poll for results on later reruns
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-job")
+
 def check_dependencies():
     """
     Check if all required dependencies are installed
@@ -55,7 +210,7 @@ def check_dependencies():
     required_packages = [
         'pandas', 'openpyxl', 'requests', 'beautifulsoup4',
         'sentence_transformers', 'rake_nltk', 'nltk', 'faiss',
-        'openai', 'sklearn', 'dotenv', 'streamlit', 'PIL', 'numpy'
+        'openai', 'dotenv', 'streamlit', 'PIL', 'numpy'
     ]
     
     missing_packages = []
@@ -66,8 +221,6 @@ def check_dependencies():
                 import PIL
             elif package == 'dotenv':
                 import dotenv
-            elif package == 'sklearn':
-                import sklearn
             else:
                 __import__(package)
         except ImportError:
@@ -0,0 +1,52 @@
+"""
+Shared CSS for the pipeline pages
+"""
+
+import streamlit as st
+
+PAGE_CSS = """
+<style>
+    .success-box {
+        background-color: #d4edda;
+        border: 1px solid #c3e6cb;
+        border-radius: 5px;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+    .info-box {
+        background-color: #d1ecf1;
+        border: 1px solid #bee5eb;
+        border-radius: 5px;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+    .warning-box {
+        background-color: #fff3cd;
+        border: 1px solid #ffeaa7;
+        border-radius: 5px;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+    .ad-preview {
+        background-color: #f8f9fa;
+        border: 1px solid #dee2e6;
+        border-radius: 8px;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+    .image-preview {
+        border: 2px solid #dee2e6;
+        border-radius: 8px;
+        padding: 1rem;
+        margin: 1rem 0;
+        text-align: center;
+    }
+</style>
+"""
+
+def inject_page_css():
+    """
+    Add the shared page styles
+    Must be called on every run: Streamlit drops elements a rerun does not emit
+    """
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
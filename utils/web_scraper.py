@@ -1,44 +1,159 @@
+import asyncio
 import requests
 from bs4 import BeautifulSoup
-import json
+import orjson
 import time
+import zipfile
+from typing import Callable, List, Optional
 
-def scrape_text_from_url(url):
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        soup = BeautifulSoup(response.text, 'html.parser')
+import aiohttp
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # C (Lexbor) HTML parser, an order of magnitude faster than BeautifulSoup for text extraction
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# HTTP statuses worth retrying with backoff; other errors fail immediately
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Scraped client records, one per line, shared by the CLI pipeline and the app pages;
+# zstd-compressed, since scraped text is the bulk of the pipeline's data on disk
+CLIENT_CONTENT_PATH = 'data/client_data_with_content.jsonl.zst'
+
+# Sent with every request; some sites reject the default python-requests/aiohttp agents
+USER_AGENT = 'Mozilla/5.0 (compatible; news-ad-generation/1.0)'
+
+# Shared session for synchronous scraping: keep-alive connections are reused across
+# calls instead of paying a TCP + TLS handshake per URL
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                       max_retries=Retry(total=3, backoff_factor=0.3,
+                                         status_forcelist=sorted(RETRY_STATUSES),
+                                         raise_on_status=False))
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.headers['User-Agent'] = USER_AGENT
+
+def extract_text_from_html(html):
+    """Extract clean, readable text from an HTML document"""
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        # Remove script and style elements
+        tree.strip_tags(['script', 'style', 'noscript'])
+        # Text nodes of the whole document joined with no separator, as BeautifulSoup's
+        # get_text() does, so inline elements stay inline and the output doesn't depend
+        # on which parser is installed
+        text = tree.root.text(separator='') if tree.root is not None else ''
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
 
         # Remove script and style elements
-        for script_or_style in soup(['script', 'style']):
+        for script_or_style in soup(['script', 'style', 'noscript']):
             script_or_style.extract()
 
         # Get text
         text = soup.get_text()
 
-        # Break into lines and remove leading/trailing space on each
-        lines = (line.strip() for line in text.splitlines())
-        # Break multi-headlines into a single line
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        # Drop blank lines
-        text = '\n'.join(chunk for chunk in chunks if chunk)
+    # Break into lines and remove leading/trailing space on each
+    lines = (line.strip() for line in text.splitlines())
+    # Break multi-headlines into a single line
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    # Drop blank lines
+    text = '\n'.join(chunk for chunk in chunks if chunk)
+
+    return text
+
+def save_content_samples(samples, path='data/content_samples.zip'):
+    """
+    Write (client_name, content) samples into a single ZIP archive
+    
+    One file open and one directory entry instead of a text file per client
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=3) as archive:
+        for client_name, content in samples:
+            sample = content[:1000] + "..." if len(content) > 1000 else content
+            archive.writestr(f"{client_name.replace(' ', '_')}_content.txt", sample)
+    return path
 
-        return text
+def scrape_text_from_url(url, timeout=10, session=None):
+    """Scrape one URL's text, reusing the shared keep-alive session unless one is given"""
+    try:
+        response = (session or _SESSION).get(url, timeout=timeout)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        return extract_text_from_html(response.text)
     except requests.exceptions.RequestException as e:
         print(f"Error scraping {url}: {e}")
         return None
 
+async def _scrape_one_async(session, semaphore, url, retries):
+    """Fetch one URL with exponential-backoff retries and extract its text"""
+    for attempt in range(retries):
+        try:
+            async with semaphore:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    html = await response.text()
+            # HTML parsing is CPU-bound, so it runs outside the connection semaphore
+            return extract_text_from_html(html)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status in RETRY_STATUSES
+            if not retryable or attempt == retries - 1:
+                print(f"Error scraping {url}: {e}")
+                return None
+            await asyncio.sleep(2 ** attempt)
+        except Exception as e:
+            # Undecodable bodies and parser failures aren't transient; only this URL fails
+            print(f"Error scraping {url}: {e}")
+            return None
+
+async def scrape_all_urls(urls: List[str], timeout: float = 10, concurrency: int = 32, retries: int = 3,
+                     on_complete: Optional[Callable[[int, Optional[str]], None]] = None) -> List[Optional[str]]:
+    """
+    Scrape many URLs concurrently
+    
+    Args:
+        urls: URLs to scrape
+        timeout: Total timeout per request in seconds
+        concurrency: Maximum number of requests in flight
+        retries: Attempts per URL for transient failures
+        on_complete: Optional callback invoked with (index, content) as each URL finishes
+        
+    Returns:
+        Scraped text per URL (None on failure), in the same order as urls
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(urls)
+
+    async def scrape_indexed(i, session):
+        return i, await _scrape_one_async(session, semaphore, urls[i], retries)
+
+    # One session for every URL, so connections to the same host are reused
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout),
+                                     headers={'User-Agent': USER_AGENT}) as session:
+        tasks = [scrape_indexed(i, session) for i in range(len(urls))]
+        for finished in asyncio.as_completed(tasks):
+            i, content = await finished
+            results[i] = content
+            if on_complete is not None:
+                on_complete(i, content)
+
+    return results
+
 if __name__ == '__main__':
     # Load parsed client data
     try:
-        with open('parsed_client_data.json', 'r') as f:
-            client_data = json.load(f)
+        with open('parsed_client_data.json', 'rb') as f:
+            client_data = orjson.loads(f.read())
     except FileNotFoundError:
         print("Please run parse_client_data.py first to generate parsed_client_data.json")
         exit(1)
     
     # Scrape all client URLs
     print("=== SCRAPING CLIENT LANDING PAGES ===")
+    samples = []
     for client in client_data:
         url = client['url']
         print(f"\nScraping {client['client_name']}: {url}")
@@ -48,15 +163,18 @@ if __name__ == '__main__':
         
         if content:
             print(f"  ✓ Successfully scraped {len(content)} characters")
-            # Save a sample for review
-            with open(f"{client['client_name'].replace(' ', '_')}_content.txt", "w", encoding="utf-8") as f:
-                f.write(content[:1000] + "..." if len(content) > 1000 else content)
+            # Keep a sample for review
+            samples.append((client['client_name'], content))
         else:
             print(f"  ✗ Failed to scrape content")
     
+    if samples:
+        print(f"Content samples saved to {save_content_samples(samples, 'content_samples.zip')}")
+    
     # Save updated data
-    with open('client_data_with_content.json', 'w', encoding='utf-8') as f:
-        json.dump(client_data, f, indent=2, ensure_ascii=False)
+    # Compact: the file is only read back by rag_processor
+    with open('client_data_with_content.json', 'wb') as f:
+        f.write(orjson.dumps(client_data))
     
     print(f"\nClient data with scraped content saved to client_data_with_content.json")
 